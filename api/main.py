@@ -2,6 +2,7 @@
 FastAPI application for Big Data Analytics.
 Exposes MongoDB data through REST endpoints.
 """
+from contextlib import asynccontextmanager
 from datetime import datetime
 from typing import Optional
 
@@ -11,12 +12,27 @@ from pydantic import BaseModel
 
 import sys
 sys.path.insert(0, "..")
-from flows.config import get_mongo_database
+from flows.config import (
+    close_mongo_client,
+    get_mongo_client,
+    get_mongo_database,
+    get_mongo_pool_stats,
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open the shared MongoDB connection pool at startup, close it at shutdown."""
+    get_mongo_client()
+    yield
+    close_mongo_client()
+
 
 app = FastAPI(
     title="Big Data Analytics API",
     description="API pour accéder aux données analytiques du pipeline Big Data",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -71,6 +87,12 @@ def health_check():
     }
 
 
+@app.get("/health/mongo-pool", tags=["Health"])
+def mongo_pool_stats():
+    """Return MongoDB connection pool statistics."""
+    return get_mongo_pool_stats()
+
+
 # ============== Dimensions Endpoints ==============
 
 @app.get("/api/v1/clients", tags=["Dimensions"])
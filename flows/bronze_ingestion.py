@@ -1,74 +1,224 @@
-from io import BytesIO
+import contextvars
+import io
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, Optional
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 from prefect import flow, task
 from prefect.logging import get_run_logger
 
 from config import (
     BUCKET_BRONZE,
     BUCKET_SOURCES,
+    CSV_BLOCK_SIZE,
     SCHEMAS,
-    get_minio_client,
-    ensure_bucket_exists,
-    calculate_file_hash,
+    BRONZE_APPEND_DELTAS,
+    BRONZE_CONCURRENCY,
+    BRONZE_DELTA_PREFIX,
+    BRONZE_MAX_IN_FLIGHT_MB,
+    BRONZE_PARQUET,
+    BRONZE_SINGLE_PASS,
+    HASH_ALGORITHM,
+    HASH_CHUNK_SIZE,
+    MULTIPART_THRESHOLD_MB,
+    UPLOAD_PART_RETRIES,
+    UPLOAD_PART_SIZE_MB,
+    UPLOAD_WORKERS,
+    VALIDATION_MEMORY_BUDGET_MB,
+)
+from catalog import (
+    compact_layer_catalog,
+    get_layer_metadata,
     get_processing_metadata,
     save_processing_metadata,
-    move_to_quarantine,
 )
+from duplicates import DuplicateKeyDetector
+from hashing import (
+    calculate_file_hashes,
+    file_matches_record,
+    get_cached_file_hash,
+    new_hasher,
+    record_hash_algorithm,
+    remember_file_hash,
+)
+from parsing import (
+    ARROW_TYPES,
+    CSV_PATTERNS,
+    compression_of,
+    csv_base_name,
+    iter_csv_frames,
+    open_csv_input,
+)
+from storage import StorageBackend, StreamingUpload, get_storage, move_to_quarantine
+
+# Primary key column of each entity, checked for duplicates
+PK_COLUMNS = {
+    "clients": "id_client",
+    "achats": "id_achat"
+}
+
+# Rows read to infer the schema of a file
+SCHEMA_SAMPLE_ROWS = 100
+
+# Rows read to estimate the memory footprint of a row before chunked parsing
+MEMORY_SAMPLE_ROWS = 1_000
+
+# Bounds of the number of rows per parsed chunk
+MIN_CHUNK_ROWS = 1_000
+MAX_CHUNK_ROWS = 1_000_000
 
 
 @task(name="Discover Source Files", retries=1)
-def discover_source_files(data_dir: str, patterns: Optional[list[str]] = None) -> list[dict]:
+def discover_source_files(
+    data_dir: str,
+    patterns: Optional[list[str]] = None,
+    hash_files: bool = True
+) -> list[dict]:
     """
     Discover all source files in the data directory.
     Supports dynamic file discovery instead of hardcoded filenames.
+    Files are hashed concurrently (see hashing.calculate_file_hashes).
 
     Args:
         data_dir: Path to the data directory.
-        patterns: List of glob patterns to match (default: ["*.csv"]).
+        patterns: List of glob patterns to match (default: CSV files, plain or
+            compressed, see parsing.CSV_PATTERNS).
+        hash_files: Hash the files. Otherwise only hashes found in the hash
+            cache are filled in, and the others are None.
 
     Returns:
-        List of file info dictionaries with path, name, and hash.
+        List of file info dictionaries with path, name, hash and hash algorithm.
     """
     prefect_logger = get_run_logger()
     data_path = Path(data_dir)
 
     if patterns is None:
-        patterns = ["*.csv"]
+        patterns = CSV_PATTERNS
 
-    files = []
+    file_paths = []
     for pattern in patterns:
         for file_path in data_path.glob(pattern):
             if file_path.is_file():
-                file_hash = calculate_file_hash(str(file_path))
-                files.append({
-                    "path": str(file_path),
-                    "name": file_path.name,
-                    "hash": file_hash,
-                    "size": file_path.stat().st_size
-                })
-                prefect_logger.info(f"Discovered file: {file_path.name} (hash: {file_hash[:8]}...)")
+                file_paths.append(file_path)
+
+    if hash_files:
+        file_hashes = calculate_file_hashes([str(file_path) for file_path in file_paths])
+    else:
+        file_hashes = [get_cached_file_hash(str(file_path)) for file_path in file_paths]
+
+    files = []
+    for file_path, file_hash in zip(file_paths, file_hashes):
+        files.append({
+            "path": str(file_path),
+            "name": file_path.name,
+            "hash": file_hash,
+            "hash_algorithm": HASH_ALGORITHM,
+            "size": file_path.stat().st_size
+        })
+        hash_label = f"{file_hash[:8]}..." if file_hash else "pending"
+        prefect_logger.info(f"Discovered file: {file_path.name} (hash: {hash_label})")
 
     prefect_logger.info(f"Total files discovered: {len(files)}")
     return files
 
 
-@task(name="Check Idempotency", retries=1)
-def check_idempotency(file_info: dict, force: bool = False) -> dict:
+def _hash_file_range(f, hasher, start: int, end: int) -> bool:
+    """Feed bytes [start, end) of an open file to a hasher; False if the file is shorter."""
+    f.seek(start)
+    remaining = end - start
+    while remaining:
+        chunk = f.read(min(HASH_CHUNK_SIZE, remaining))
+        if not chunk:
+            return False
+        hasher.update(chunk)
+        remaining -= len(chunk)
+    return True
+
+
+def _last_line_end(f, start: int, end: int) -> int:
+    """Offset just after the last newline in bytes [start, end) of an open file, or start."""
+    position = end
+    while position > start:
+        block_start = max(start, position - HASH_CHUNK_SIZE)
+        f.seek(block_start)
+        block = f.read(position - block_start)
+        newline = block.rfind(b"\n")
+        if newline >= 0:
+            return block_start + newline + 1
+        position = block_start
+    return start
+
+
+def detect_append(file_info: dict, record: dict) -> Optional[dict]:
     """
-    Check if file has already been processed with the same hash.
+    Check whether a changed file is the content ingested before plus new lines.
+
+    The first source_size bytes of the file are hashed with the algorithm of
+    the record: if they still have the recorded hash and end a line, the file
+    only grew. The same hasher then goes on over the complete lines added,
+    which gives the hash of the file up to them. Bytes after the last
+    newline, a line still being written, are left for the next run.
 
     Args:
         file_info: File information dictionary.
+        record: Bronze metadata record of the file.
+
+    Returns:
+        Offset and end of the new lines and hash of the file up to end, or
+        None if the file was not only appended to.
+    """
+    offset = record.get("source_size")
+    if (
+        not offset
+        or file_info["size"] <= offset
+        or compression_of(file_info["name"])
+        or record_hash_algorithm(record) != file_info["hash_algorithm"]
+    ):
+        return None
+
+    hasher = new_hasher(file_info["hash_algorithm"])
+    with open(file_info["path"], "rb") as f:
+        if not _hash_file_range(f, hasher, 0, offset) or hasher.hexdigest() != record.get("source_hash"):
+            return None
+        f.seek(offset - 1)
+        if f.read(1) != b"\n":
+            # The last line ingested was extended, not only followed
+            return None
+        end = _last_line_end(f, offset, file_info["size"])
+        if end == offset or not _hash_file_range(f, hasher, offset, end):
+            return None
+
+    return {"offset": offset, "end": end, "hash": hasher.hexdigest(), "base_metadata": record}
+
+
+def decide_idempotency(
+    file_info: dict,
+    existing_metadata: Optional[dict],
+    force: bool = False,
+    matches: Optional[bool] = None,
+    append_deltas: bool = BRONZE_APPEND_DELTAS
+) -> dict:
+    """
+    Set the should_process flag and reason of a file from its bronze record.
+
+    Args:
+        file_info: File information dictionary.
+        existing_metadata: Bronze metadata record of the file, or None.
         force: Force reprocessing even if already processed.
+        matches: Whether the file has the recorded hash, if already known.
+        append_deltas: Ingest only the new lines of a file that was appended to.
 
     Returns:
         Updated file info with should_process flag.
     """
     prefect_logger = get_run_logger()
-    client = get_minio_client()
 
     if force:
         file_info["should_process"] = True
@@ -76,18 +226,38 @@ def check_idempotency(file_info: dict, force: bool = False) -> dict:
         prefect_logger.info(f"{file_info['name']}: Force reprocessing enabled")
         return file_info
 
-    # Check existing metadata
-    existing_metadata = get_processing_metadata(client, BUCKET_BRONZE, file_info["name"])
-
-    if existing_metadata:
-        if existing_metadata.get("source_hash") == file_info["hash"]:
+    if existing_metadata and file_info["hash"] is None:
+        # Not hashed yet: the single-pass ingestion compares it once read
+        file_info["should_process"] = True
+        file_info["reason"] = "hash_pending"
+        file_info["previous_metadata"] = {
+            "source_hash": existing_metadata.get("source_hash"),
+            "hash_algorithm": record_hash_algorithm(existing_metadata),
+            "source_size": existing_metadata.get("source_size")
+        }
+        prefect_logger.info(f"{file_info['name']}: Known file, hash checked while ingesting")
+    elif existing_metadata:
+        if matches is None:
+            matches = file_matches_record(
+                file_info["path"], file_info["hash"], file_info["hash_algorithm"], existing_metadata
+            )
+        if matches:
             file_info["should_process"] = False
             file_info["reason"] = "already_processed_same_hash"
             prefect_logger.info(f"{file_info['name']}: Already processed with same hash, skipping")
         else:
+            append = detect_append(file_info, existing_metadata) if append_deltas else None
             file_info["should_process"] = True
-            file_info["reason"] = "hash_changed"
-            prefect_logger.info(f"{file_info['name']}: Hash changed, will reprocess")
+            if append:
+                file_info["reason"] = "appended"
+                file_info["append"] = append
+                prefect_logger.info(
+                    f"{file_info['name']}: {append['end'] - append['offset']} bytes appended, "
+                    f"will ingest the new lines only"
+                )
+            else:
+                file_info["reason"] = "hash_changed"
+                prefect_logger.info(f"{file_info['name']}: Hash changed, will reprocess")
     else:
         file_info["should_process"] = True
         file_info["reason"] = "new_file"
@@ -96,36 +266,110 @@ def check_idempotency(file_info: dict, force: bool = False) -> dict:
     return file_info
 
 
-@task(name="Infer Schema", retries=1)
-def infer_schema(file_path: str) -> dict:
+@task(name="Check Idempotency", retries=1)
+def check_idempotency(file_info: dict, force: bool = False, append_deltas: bool = BRONZE_APPEND_DELTAS) -> dict:
     """
-    Infer schema from CSV file and compare with expected schema.
+    Check if file has already been processed with the same hash.
 
     Args:
-        file_path: Path to the CSV file.
+        file_info: File information dictionary.
+        force: Force reprocessing even if already processed.
+        append_deltas: Ingest only the new lines of a file that was appended to.
+
+    Returns:
+        Updated file info with should_process flag.
+    """
+    if force:
+        return decide_idempotency(file_info, None, force=True)
+
+    existing_metadata = get_processing_metadata(get_storage(), BUCKET_BRONZE, file_info["name"])
+    return decide_idempotency(file_info, existing_metadata, append_deltas=append_deltas)
+
+
+@task(name="Check Idempotency Batch", retries=1)
+def check_idempotency_batch(
+    files: list[dict],
+    force: bool = False,
+    append_deltas: bool = BRONZE_APPEND_DELTAS
+) -> list[dict]:
+    """
+    Check all discovered files against the bronze catalog at once.
+
+    The records of all files come from one read of the catalog, and the
+    files whose record was hashed with another algorithm are hashed again
+    concurrently. Decisions are the same as check_idempotency's.
+
+    Args:
+        files: File information dictionaries.
+        force: Force reprocessing even if already processed.
+        append_deltas: Ingest only the new lines of a file that was appended to.
+
+    Returns:
+        Updated file infos with should_process flags, in the same order.
+    """
+    if force:
+        return [decide_idempotency(file_info, None, force=True) for file_info in files]
+
+    records = get_layer_metadata(get_storage(), BUCKET_BRONZE, [file_info["name"] for file_info in files])
+
+    # Files to hash again with the algorithm of their record, by algorithm
+    rehash: dict[str, list[dict]] = {}
+    for file_info in files:
+        record = records[file_info["name"]]
+        if record and file_info["hash"] is not None and record_hash_algorithm(record) != file_info["hash_algorithm"]:
+            rehash.setdefault(record_hash_algorithm(record), []).append(file_info)
+
+    matches = {}
+    for algorithm, rehashed in rehash.items():
+        try:
+            digests = calculate_file_hashes([file_info["path"] for file_info in rehashed], algorithm)
+        except ValueError:
+            # Algorithm not available here: reported as changed
+            digests = [None] * len(rehashed)
+        for file_info, digest in zip(rehashed, digests):
+            matches[file_info["name"]] = digest is not None and digest == records[file_info["name"]].get("source_hash")
+
+    return [
+        decide_idempotency(
+            file_info, records[file_info["name"]], matches=matches.get(file_info["name"]), append_deltas=append_deltas
+        )
+        for file_info in files
+    ]
+
+
+def source_stem(file_path: str) -> str:
+    """File name without its extensions (data/clients.csv.gz -> clients)."""
+    return Path(csv_base_name(file_path)).stem
+
+
+def detect_entity_type(file_name: str) -> Optional[str]:
+    """Determine the entity type of a file from its name."""
+    for key in SCHEMAS.keys():
+        if key in file_name.lower():
+            return key
+    return None
+
+
+def describe_schema(df_sample: pd.DataFrame, file_name: str) -> dict:
+    """
+    Describe the schema of a sample and compare it with the expected schema.
+
+    Args:
+        df_sample: First rows of the file.
+        file_name: File name without extension.
 
     Returns:
         Schema information with validation status.
     """
     prefect_logger = get_run_logger()
 
-    # Read a sample of the file to infer schema
-    df_sample = pd.read_csv(file_path, nrows=100)
-
     inferred_schema = {
         "columns": list(df_sample.columns),
         "dtypes": {col: str(dtype) for col, dtype in df_sample.dtypes.items()},
         "row_count_sample": len(df_sample)
     }
 
-    # Determine entity type from filename
-    file_name = Path(file_path).stem
-    entity_type = None
-    for key in SCHEMAS.keys():
-        if key in file_name.lower():
-            entity_type = key
-            break
-
+    entity_type = detect_entity_type(file_name)
     inferred_schema["entity_type"] = entity_type
 
     # Validate against expected schema if entity type is known
@@ -153,77 +397,373 @@ def infer_schema(file_path: str) -> dict:
     return inferred_schema
 
 
-@task(name="Validate File Content", retries=1)
-def validate_file_content(file_path: str, schema_info: dict) -> dict:
+@task(name="Infer Schema", retries=1)
+def infer_schema(file_path: str) -> dict:
     """
-    Validate file content beyond schema: check for corruption, encoding, etc.
+    Infer schema from CSV file and compare with expected schema.
 
     Args:
-        file_path: Path to the CSV file.
-        schema_info: Schema information from infer_schema.
+        file_path: Path to the CSV file, possibly compressed.
 
     Returns:
-        Validation result with status and errors.
+        Schema information with validation status.
     """
-    prefect_logger = get_run_logger()
-    validation = {
-        "valid": True,
-        "errors": [],
-        "warnings": [],
-        "row_count": 0
-    }
+    # Read a sample of the file to infer schema. The types are those found
+    # in the file, not the SCHEMAS ones the Arrow reader would force
+    with open_csv_input(file_path) as f:
+        df_sample = pd.read_csv(f, nrows=SCHEMA_SAMPLE_ROWS)
+    return describe_schema(df_sample, source_stem(file_path))
+
+
+def validation_budget_bytes() -> int:
+    """Memory budget of the validation of one file."""
+    return VALIDATION_MEMORY_BUDGET_MB * 1024 * 1024
+
 
+def chunk_rows_for_budget(file_path: str, budget_bytes: int) -> int:
+    """
+    Number of rows per chunk so that a parsed chunk fits in budget_bytes.
+
+    The in-memory size of a row is measured on the first rows of the file.
+    """
     try:
-        # Try to read the entire file
-        df = pd.read_csv(file_path)
-        validation["row_count"] = len(df)
+        with open_csv_input(file_path) as f:
+            sample = pd.read_csv(f, nrows=MEMORY_SAMPLE_ROWS)
+    except Exception:
+        # Unreadable: let the chunked read report the error
+        return MIN_CHUNK_ROWS
+    if len(sample) == 0:
+        return MIN_CHUNK_ROWS
+    # The parser holds about as much again while building a chunk
+    row_bytes = 2 * sample.memory_usage(deep=True).sum() / len(sample)
+    return int(min(MAX_CHUNK_ROWS, max(MIN_CHUNK_ROWS, budget_bytes // row_bytes)))
+
+
+def csv_block_size(budget_bytes: int) -> int:
+    """Arrow CSV block size so that a parsed block fits in budget_bytes."""
+    # A block takes a few times its text size once parsed into a DataFrame
+    return max(1024 * 1024, min(CSV_BLOCK_SIZE, budget_bytes // 4))
+
+
+class ValidationStats:
+    """
+    Content validation statistics of a CSV, accumulated chunk by chunk.
+
+    Only counters and the primary keys are kept. Integer keys go to a
+    DuplicateKeyDetector bounded by key_budget_bytes; other key values
+    (malformed ids) are kept in a set.
+    """
+
+    def __init__(self, entity_type: Optional[str], key_budget_bytes: Optional[int] = None):
+        self.entity_type = entity_type
+        self.pk_column = PK_COLUMNS.get(entity_type)
+        self.row_count = 0
+        self.columns: list[str] = []
+        self.null_counts: dict[str, int] = {}
+        self._keys = DuplicateKeyDetector(key_budget_bytes or validation_budget_bytes() // 2)
+        self._other_keys: set = set()
+        self._other_duplicates = 0
+        self._null_keys = 0
+
+    def update(self, df: pd.DataFrame) -> None:
+        """Add the rows of a chunk."""
+        if not self.columns:
+            self.columns = list(df.columns)
+        self.row_count += len(df)
+        for col, count in df.isnull().sum().items():
+            self.null_counts[col] = self.null_counts.get(col, 0) + int(count)
+        if self.pk_column in df.columns:
+            self._count_duplicates(df[self.pk_column])
+
+    def _count_duplicates(self, values: pd.Series) -> None:
+        """Record the keys of a chunk; duplicates are counted as Series.duplicated does."""
+        nulls = values.isnull()
+        self._null_keys += int(nulls.sum())
+        values = values[~nulls]
+
+        if pd.api.types.is_numeric_dtype(values):
+            numeric = values
+        else:
+            # Only canonical integer text is tracked as a number: "05" and "5" differ
+            text = values.astype(str)
+            numeric = pd.to_numeric(text.where(text.str.fullmatch(r"-?(0|[1-9]\d{0,17})")), errors="coerce")
+        integral = numeric.notnull() & (numeric == np.floor(numeric)) & (numeric.abs() < 2 ** 63)
+        self._keys.add(numeric[integral].to_numpy(dtype=np.int64))
+
+        for value in values[~integral].tolist():
+            if value in self._other_keys:
+                self._other_duplicates += 1
+            else:
+                self._other_keys.add(value)
+
+    @property
+    def duplicate_count(self) -> int:
+        """Number of primary key values equal to an earlier one."""
+        return self._keys.duplicate_count() + self._other_duplicates + max(0, self._null_keys - 1)
+
+    def close(self) -> None:
+        """Release the temporary files of the key tracking."""
+        self._keys.close()
+
+    def result(self) -> dict:
+        """Build the validation result."""
+        validation = {
+            "valid": True,
+            "errors": [],
+            "warnings": [],
+            "row_count": self.row_count
+        }
 
         # Check for empty file
-        if len(df) == 0:
+        if self.row_count == 0:
             validation["valid"] = False
             validation["errors"].append("File is empty")
             return validation
 
         # Check for completely null columns
-        null_columns = df.columns[df.isnull().all()].tolist()
+        null_columns = [col for col in self.columns if self.null_counts.get(col, 0) == self.row_count]
         if null_columns:
             validation["warnings"].append(f"Completely null columns: {null_columns}")
 
         # Check for high null rate in required columns
-        if schema_info.get("entity_type") in SCHEMAS:
-            required_cols = SCHEMAS[schema_info["entity_type"]]["required_columns"]
+        if self.entity_type in SCHEMAS:
+            required_cols = SCHEMAS[self.entity_type]["required_columns"]
             for col in required_cols:
-                if col in df.columns:
-                    null_rate = df[col].isnull().sum() / len(df)
+                if col in self.columns:
+                    null_rate = self.null_counts[col] / self.row_count
                     if null_rate > 0.5:
                         validation["warnings"].append(f"Column {col} has {null_rate:.1%} null values")
 
         # Check for duplicate primary keys
-        entity_type = schema_info.get("entity_type")
-        pk_columns = {
-            "clients": "id_client",
-            "achats": "id_achat"
-        }
-        if entity_type in pk_columns and pk_columns[entity_type] in df.columns:
-            pk_col = pk_columns[entity_type]
-            dup_count = df[pk_col].duplicated().sum()
-            if dup_count > 0:
-                validation["warnings"].append(f"{dup_count} duplicate values in {pk_col}")
+        if self.pk_column in self.columns:
+            duplicate_count = self.duplicate_count
+            if duplicate_count > 0:
+                validation["warnings"].append(f"{duplicate_count} duplicate values in {self.pk_column}")
+
+        return validation
+
 
-        prefect_logger.info(f"Validation complete: valid={validation['valid']}, rows={validation['row_count']}")
+@task(name="Validate File Content", retries=1)
+def validate_file_content(file_path: str, schema_info: dict, length: Optional[int] = None) -> dict:
+    """
+    Validate file content beyond schema: check for corruption, encoding, etc.
 
+    Args:
+        file_path: Path to the CSV file.
+        schema_info: Schema information from infer_schema.
+        length: Only validate the first `length` bytes, the ones uploaded
+            (default: the whole file).
+
+    Returns:
+        Validation result with status and errors.
+    """
+    prefect_logger = get_run_logger()
+    entity_type = schema_info.get("entity_type")
+    budget = validation_budget_bytes()
+    stats = ValidationStats(entity_type, key_budget_bytes=budget // 2)
+
+    try:
+        # Stream over the file so memory stays within the budget
+        try:
+            for chunk in iter_csv_frames(file_path, entity_type, csv_block_size(budget // 2), length):
+                stats.update(chunk)
+        except pa.ArrowInvalid:
+            # Rows the Arrow reader rejects (e.g. missing fields): start over with pandas
+            stats.close()
+            stats = ValidationStats(entity_type, key_budget_bytes=budget // 2)
+            chunk_rows = chunk_rows_for_budget(file_path, budget // 2)
+            with open_csv_input(file_path, length=length) as f:
+                for chunk in pd.read_csv(f, chunksize=chunk_rows):
+                    stats.update(chunk)
+        validation = stats.result()
     except Exception as e:
-        validation["valid"] = False
-        validation["errors"].append(f"Failed to read file: {str(e)}")
-        prefect_logger.error(f"Validation failed: {e}")
+        return read_failure(e)
+    finally:
+        stats.close()
 
+    prefect_logger.info(f"Validation complete: valid={validation['valid']}, rows={validation['row_count']}")
     return validation
 
 
+def read_failure(error: Exception) -> dict:
+    """Validation result of a file that could not be parsed."""
+    get_run_logger().error(f"Validation failed: {error}")
+    return {
+        "valid": False,
+        "errors": [f"Failed to read file: {str(error)}"],
+        "warnings": [],
+        "row_count": 0
+    }
+
+
+class _SinglePassReader(io.RawIOBase):
+    """
+    File reader that passes every byte it reads to the hashers and the
+    upload. For a compressed file these are the compressed bytes.
+
+    It stops after `size` bytes, the length announced to the upload, so
+    bytes appended to the file meanwhile are neither hashed, uploaded
+    nor validated.
+    """
+
+    def __init__(self, f, hashers: dict, upload: StreamingUpload, size: int):
+        super().__init__()
+        self._file = f
+        self._hashers = hashers
+        self._upload = upload
+        self._remaining = size
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        if self._remaining <= 0:
+            return 0
+        view = memoryview(b)[:self._remaining]
+        n = self._file.readinto(view)
+        if n:
+            chunk = view[:n]
+            for hasher in self._hashers.values():
+                hasher.update(chunk)
+            self._upload.write(chunk)
+            self._remaining -= n
+        return n
+
+    def drain(self) -> None:
+        """Read what the parser left, so the hash and the upload cover the whole file."""
+        buffer = bytearray(1024 * 1024)
+        while self.readinto(buffer):
+            pass
+
+
+class _SampleReader(io.RawIOBase):
+    """Reader for the CSV parser that keeps the first lines for schema inference."""
+
+    def __init__(self, raw, sample_lines: int):
+        super().__init__()
+        self._raw = raw
+        self._sample_lines = sample_lines
+        self._sample_newlines = 0
+        self.sample = bytearray()
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        n = self._raw.readinto(b)
+        if n and self._sample_newlines <= self._sample_lines:
+            chunk = memoryview(b)[:n]
+            self.sample += chunk
+            self._sample_newlines += chunk.tobytes().count(b"\n")
+        return n
+
+
+def matches_previous_record(file_path: str, st: os.stat_result, previous: dict) -> bool:
+    """
+    Check a file with a pending hash against its record before it is uploaded.
+
+    The digest comes from the hash cache when the stat of the file is
+    unchanged. Otherwise the file is hashed first only when it has the
+    recorded size: a file of another size has changed anyway.
+    """
+    algorithm = previous["hash_algorithm"]
+    try:
+        digest = get_cached_file_hash(file_path, algorithm)
+        if digest is None and previous.get("source_size") == st.st_size:
+            digest = calculate_file_hashes([file_path], algorithm)[0]
+    except ValueError:
+        return False
+    return digest is not None and digest == previous["source_hash"]
+
+
+@task(name="Ingest File Single Pass", retries=1)
+def ingest_file_single_pass(file_info: dict) -> tuple[dict, dict, dict]:
+    """
+    Hash, infer the schema, validate and upload a file to the sources bucket
+    in a single read.
+
+    Each block read by the chunked CSV parser also updates the hash and is
+    streamed to the upload. When the file has a previous record with an
+    unknown hash (reason "hash_pending"), its hash is compared as well and
+    file_info["unchanged"] is set. Such a file is first checked by
+    matches_previous_record, so an unchanged one is not uploaded again.
+
+    Args:
+        file_info: File information dictionary.
+
+    Returns:
+        Tuple of (file info with its hash, schema information, validation results).
+    """
+    prefect_logger = get_run_logger()
+    storage = get_storage()
+
+    storage.ensure_bucket(BUCKET_SOURCES)
+
+    previous = file_info.get("previous_metadata")
+    st = os.stat(file_info["path"])
+    if previous and matches_previous_record(file_info["path"], st, previous):
+        file_info["unchanged"] = True
+        prefect_logger.info(f"{file_info['name']}: Already processed with same hash, skipping")
+        return file_info, {}, {}
+
+    hashers = {HASH_ALGORITHM: new_hasher(HASH_ALGORITHM)}
+    if previous and previous["hash_algorithm"] not in hashers:
+        hashers[previous["hash_algorithm"]] = new_hasher(previous["hash_algorithm"])
+
+    file_name = source_stem(file_info["path"])
+    budget = validation_budget_bytes()
+    chunk_rows = chunk_rows_for_budget(file_info["path"], budget // 2)
+    stats = ValidationStats(detect_entity_type(file_name), key_budget_bytes=budget // 2)
+    parse_error = None
+
+    upload = StreamingUpload(storage, BUCKET_SOURCES, file_info["name"], st.st_size)
+    try:
+        with open(file_info["path"], "rb") as f:
+            reader = _SinglePassReader(f, hashers, upload, st.st_size)
+            # A compressed file is hashed and uploaded as is, parsed decompressed
+            compression = compression_of(file_info["name"])
+            decoded = pa.CompressedInputStream(pa.PythonFile(reader, mode="r"), compression) if compression else reader
+            parsed = _SampleReader(decoded, SCHEMA_SAMPLE_ROWS + 1)
+            try:
+                for chunk in pd.read_csv(parsed, chunksize=chunk_rows):
+                    stats.update(chunk)
+            except Exception as e:
+                parse_error = e
+            reader.drain()
+    except BaseException:
+        upload.abort()
+        stats.close()
+        raise
+    upload.close()
+    prefect_logger.info(f"Uploaded {file_info['name']} to {BUCKET_SOURCES}")
+
+    # The size and hash of the bytes read, which are those uploaded
+    file_info["hash"] = hashers[HASH_ALGORITHM].hexdigest()
+    file_info["hash_algorithm"] = HASH_ALGORITHM
+    file_info["size"] = st.st_size
+    remember_file_hash(file_info["path"], st, HASH_ALGORITHM, file_info["hash"])
+    if previous:
+        file_info["unchanged"] = hashers[previous["hash_algorithm"]].hexdigest() == previous["source_hash"]
+
+    df_sample = pd.read_csv(io.BytesIO(parsed.sample), nrows=SCHEMA_SAMPLE_ROWS)
+    schema_info = describe_schema(df_sample, file_name)
+
+    try:
+        if parse_error is not None:
+            validation = read_failure(parse_error)
+        else:
+            validation = stats.result()
+            prefect_logger.info(f"Validation complete: valid={validation['valid']}, rows={validation['row_count']}")
+    finally:
+        stats.close()
+
+    return file_info, schema_info, validation
+
+
 @task(name="Upload to Sources", retries=2)
 def upload_to_sources(file_info: dict) -> str:
     """
-    Upload local file to MinIO sources bucket.
+    Upload local file to the sources bucket.
 
     Args:
         file_info: File information dictionary.
@@ -232,22 +772,110 @@ def upload_to_sources(file_info: dict) -> str:
         Object name in the sources bucket.
     """
     prefect_logger = get_run_logger()
-    client = get_minio_client()
-
-    ensure_bucket_exists(client, BUCKET_SOURCES)
-
-    client.fput_object(BUCKET_SOURCES, file_info["name"], file_info["path"])
+    storage = get_storage()
+
+    storage.ensure_bucket(BUCKET_SOURCES)
+
+    # Only the bytes measured at discovery are uploaded, so that lines appended
+    # since are left to the next run's delta; the upload hashes them again
+    size = file_info["size"]
+    multipart = size > MULTIPART_THRESHOLD_MB * 1024 * 1024
+    hasher = new_hasher(file_info.get("hash_algorithm", HASH_ALGORITHM))
+    storage.put_file_parts(
+        BUCKET_SOURCES,
+        file_info["name"],
+        file_info["path"],
+        part_size=UPLOAD_PART_SIZE_MB * 1024 * 1024 if multipart else max(size, 1),
+        max_workers=UPLOAD_WORKERS if multipart else 1,
+        retries=UPLOAD_PART_RETRIES,
+        hasher=hasher,
+        length=size
+    )
+    if hasher.hexdigest() != file_info.get("hash"):
+        # Appended to between hashing and stat: record the bytes uploaded
+        if file_info.get("hash"):
+            prefect_logger.warning(f"{file_info['name']} changed since it was hashed, recording the uploaded bytes")
+        file_info["hash"] = hasher.hexdigest()
     prefect_logger.info(f"Uploaded {file_info['name']} to {BUCKET_SOURCES}")
 
     return file_info["name"]
 
 
+def columnar_copy_key(object_name: str) -> str:
+    """Key of the Parquet copy of a bronze object."""
+    return f"{object_name}.parquet"
+
+
+def columnar_schema(df_sample: pd.DataFrame, entity_type: Optional[str]) -> pa.Schema:
+    """Arrow schema of a file: SCHEMAS types, inferred types for other columns."""
+    types = SCHEMAS.get(entity_type, {}).get("types", {})
+    inferred = pa.Schema.from_pandas(df_sample, preserve_index=False)
+    return pa.schema([
+        pa.field(field.name, ARROW_TYPES.get(types.get(field.name), field.type))
+        for field in inferred
+    ])
+
+
+def write_columnar_copy(
+    storage: StorageBackend,
+    object_name: str,
+    file_path: str,
+    entity_type: Optional[str],
+    length: Optional[int] = None
+) -> Optional[str]:
+    """
+    Write a typed, zstd-compressed Parquet copy of a bronze CSV.
+
+    The file is converted chunk by chunk within the validation memory
+    budget, up to `length` bytes when given, so the copy holds the rows of
+    the bronze object. A file whose values do not fit the types gets no copy.
+
+    Returns:
+        Key of the copy in the bronze bucket, or None.
+    """
+    key = columnar_copy_key(object_name)
+    budget = validation_budget_bytes() // 2
+
+    def write(path: str, chunks: Iterator[pd.DataFrame]) -> bool:
+        writer = None
+        try:
+            for chunk in chunks:
+                if writer is None:
+                    schema = columnar_schema(chunk, entity_type)
+                    writer = pq.ParquetWriter(path, schema, compression="zstd")
+                writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+        finally:
+            if writer is not None:
+                writer.close()
+        return writer is not None
+
+    with tempfile.NamedTemporaryFile(suffix=".parquet") as tmp:
+        try:
+            try:
+                written = write(tmp.name, iter_csv_frames(file_path, entity_type, csv_block_size(budget), length))
+            except pa.ArrowInvalid:
+                # Rows the Arrow reader rejects: convert with pandas instead
+                chunk_rows = chunk_rows_for_budget(file_path, budget)
+                with open_csv_input(file_path, length=length) as f:
+                    written = write(tmp.name, pd.read_csv(f, chunksize=chunk_rows))
+        except (pa.ArrowInvalid, pa.ArrowTypeError, ValueError) as e:
+            get_run_logger().warning(f"No Parquet copy of {object_name}: values do not fit the schema types ({e})")
+            return None
+        if not written:
+            return None
+        storage.put_file(BUCKET_BRONZE, key, tmp.name, content_type="application/vnd.apache.parquet")
+
+    return key
+
+
 @task(name="Copy to Bronze Layer", retries=2)
 def copy_to_bronze_layer(
     object_name: str,
     file_info: dict,
     schema_info: dict,
-    validation: dict
+    validation: dict,
+    columnar: bool = BRONZE_PARQUET,
+    extra_metadata: Optional[dict] = None
 ) -> Optional[str]:
     """
     Copy file from sources to bronze bucket with metadata.
@@ -258,57 +886,312 @@ def copy_to_bronze_layer(
         file_info: File information dictionary.
         schema_info: Schema information.
         validation: Validation results.
+        columnar: Also write a typed Parquet copy (write_columnar_copy).
+        extra_metadata: Additional fields of the bronze record.
 
     Returns:
         Object name in bronze bucket, or None if quarantined.
     """
     prefect_logger = get_run_logger()
-    client = get_minio_client()
+    storage = get_storage()
 
     # Check if file should be quarantined
     if not schema_info.get("schema_valid", True):
         reason = f"Schema validation failed: missing columns {schema_info.get('missing_columns', [])}"
-        move_to_quarantine(client, BUCKET_SOURCES, object_name, reason)
+        move_to_quarantine(storage, BUCKET_SOURCES, object_name, reason)
         return None
 
     if not validation.get("valid", True):
         reason = f"Content validation failed: {validation.get('errors', [])}"
-        move_to_quarantine(client, BUCKET_SOURCES, object_name, reason)
+        move_to_quarantine(storage, BUCKET_SOURCES, object_name, reason)
         return None
 
     # Copy to bronze
-    ensure_bucket_exists(client, BUCKET_BRONZE)
-
-    response = client.get_object(BUCKET_SOURCES, object_name)
-    data = response.read()
-    response.close()
-    response.release_conn()
-
-    client.put_object(BUCKET_BRONZE, object_name, BytesIO(data), length=len(data))
+    storage.ensure_bucket(BUCKET_BRONZE)
+    storage.copy(BUCKET_SOURCES, object_name, BUCKET_BRONZE, object_name)
+
+    extra = {
+        "schema": schema_info,
+        "validation_warnings": validation.get("warnings", []),
+        # Length of the content hashed, for detect_append
+        "source_size": file_info["size"],
+        "layer": "bronze"
+    }
+    if extra_metadata:
+        extra.update(extra_metadata)
+    if columnar:
+        columnar_key = write_columnar_copy(
+            storage, object_name, file_info["path"], schema_info.get("entity_type"), file_info["size"]
+        )
+        if columnar_key:
+            # Tied to the source hash: a copy left by an earlier version is ignored
+            extra["columnar_copy"] = {"key": columnar_key, "source_hash": file_info["hash"]}
+            prefect_logger.info(f"Wrote Parquet copy {columnar_key}")
 
     # Save processing metadata
     save_processing_metadata(
-        client=client,
+        storage=storage,
         object_name=object_name,
         source_hash=file_info["hash"],
         row_count=validation.get("row_count", 0),
         status="ingested_to_bronze",
-        extra={
-            "schema": schema_info,
-            "validation_warnings": validation.get("warnings", []),
-            "layer": "bronze"
-        }
+        extra=extra
     )
 
     prefect_logger.info(f"Copied {object_name} to {BUCKET_BRONZE}")
     return object_name
 
 
+def delta_object_name(object_name: str, offset: int, end: int) -> str:
+    """Name of the delta object of the bytes [offset, end) appended to a file."""
+    return f"{BRONZE_DELTA_PREFIX}{object_name}/{offset:015d}-{end:015d}.csv"
+
+
+@task(name="Write Append Delta", retries=1)
+def write_append_delta(file_info: dict, tmp_dir: str) -> dict:
+    """
+    Write the lines appended to a file as a CSV of their own, under the
+    header of the file, so it is validated and read like any source file.
+
+    Args:
+        file_info: File information, with the append found by detect_append.
+        tmp_dir: Directory of the delta file.
+
+    Returns:
+        File information of the delta file, named by delta_object_name.
+    """
+    append = file_info["append"]
+    # Same file name as the source, so the entity is detected from it
+    delta_path = os.path.join(tmp_dir, file_info["name"])
+    hasher = new_hasher(file_info["hash_algorithm"])
+
+    with open(file_info["path"], "rb") as source, open(delta_path, "wb") as delta:
+        header = source.readline()
+        delta.write(header)
+        hasher.update(header)
+        source.seek(append["offset"])
+        remaining = append["end"] - append["offset"]
+        while remaining:
+            chunk = source.read(min(HASH_CHUNK_SIZE, remaining))
+            if not chunk:
+                raise ValueError(f"{file_info['name']} was truncated while reading its appended lines")
+            delta.write(chunk)
+            hasher.update(chunk)
+            remaining -= len(chunk)
+
+    get_run_logger().info(f"Wrote delta of {file_info['name']} ({append['offset']}-{append['end']})")
+    return {
+        "path": delta_path,
+        "name": delta_object_name(file_info["name"], append["offset"], append["end"]),
+        "hash": hasher.hexdigest(),
+        "hash_algorithm": file_info["hash_algorithm"],
+        "size": os.path.getsize(delta_path)
+    }
+
+
+@task(name="Record Append", retries=2)
+def record_append(file_info: dict, delta_name: str, delta_rows: int) -> None:
+    """
+    Update the bronze record of a file after a delta of it was ingested.
+
+    The record takes the hash and size of the file up to the end of the
+    delta and lists the delta, so the bronze object and its deltas together
+    are the file as ingested.
+
+    Args:
+        file_info: File information, with the append found by detect_append.
+        delta_name: Bronze object of the delta.
+        delta_rows: Rows of the delta.
+    """
+    append = file_info["append"]
+    base = append["base_metadata"]
+    catalog_fields = (
+        "object_name", "source_hash", "row_count", "status", "hash_algorithm", "processed_at", "pipeline_version"
+    )
+    extra = {key: value for key, value in base.items() if key not in catalog_fields}
+    # The Parquet copy only holds the content of the bronze object
+    extra.pop("columnar_copy", None)
+    extra["source_size"] = append["end"]
+    extra["deltas"] = base.get("deltas", []) + [delta_name]
+
+    save_processing_metadata(
+        storage=get_storage(),
+        object_name=file_info["name"],
+        source_hash=append["hash"],
+        row_count=base.get("row_count", 0) + delta_rows,
+        status="ingested_to_bronze",
+        extra=extra
+    )
+
+
+def process_appended_file(file_info: dict) -> tuple[str, dict]:
+    """
+    Ingest only the lines appended to a file: the delta is validated,
+    uploaded and copied to bronze as an object of its own, then the record
+    of the file lists it.
+
+    Duplicate keys are checked within the delta, not against the lines
+    ingested before.
+
+    Returns:
+        Tuple of (result category, result entry), as process_source_file.
+    """
+    append = file_info["append"]
+    with tempfile.TemporaryDirectory(prefix="bronze-delta-") as tmp_dir:
+        delta_info = write_append_delta(file_info, tmp_dir)
+        schema_info = infer_schema(delta_info["path"])
+        validation = validate_file_content(delta_info["path"], schema_info)
+        object_name = upload_to_sources(delta_info)
+        delta_metadata = {
+            "delta_of": file_info["name"],
+            "offset": append["offset"],
+            "end": append["end"],
+            "base_hash": append["base_metadata"].get("source_hash")
+        }
+        bronze_name = copy_to_bronze_layer(
+            object_name, delta_info, schema_info, validation, columnar=False, extra_metadata=delta_metadata
+        )
+
+    if not bronze_name:
+        return "quarantined", {
+            "name": delta_info["name"],
+            "reason": "validation_failed"
+        }
+    record_append(file_info, bronze_name, validation.get("row_count", 0))
+    return "processed", {
+        "name": bronze_name,
+        "rows": validation.get("row_count", 0),
+        "schema": schema_info.get("entity_type", "unknown"),
+        "warnings": validation.get("warnings", [])
+    }
+
+
+def process_source_file(
+    file_info: dict,
+    single_pass: bool,
+    columnar: bool = BRONZE_PARQUET
+) -> tuple[str, dict]:
+    """
+    Run the ingestion chain of one file to process: schema inference,
+    validation, upload and copy to bronze. Of a file that was appended to,
+    only the new lines are ingested (process_appended_file).
+
+    Args:
+        file_info: File information, checked by check_idempotency_batch.
+        single_pass: Ingest the file in a single read.
+        columnar: Also write a typed Parquet copy to bronze.
+
+    Returns:
+        Tuple of (result category, result entry), the category being one of
+        "processed", "skipped", "quarantined" or "errors".
+    """
+    try:
+        if file_info.get("append"):
+            return process_appended_file(file_info)
+
+        if single_pass:
+            # Hash, infer schema, validate and upload in one read
+            file_info, schema_info, validation = ingest_file_single_pass(file_info)
+            if file_info.get("unchanged"):
+                return "skipped", {
+                    "name": file_info["name"],
+                    "reason": "already_processed_same_hash"
+                }
+            object_name = file_info["name"]
+        else:
+            # Infer and validate schema
+            schema_info = infer_schema(file_info["path"])
+
+            # Validate file content
+            validation = validate_file_content(file_info["path"], schema_info, file_info["size"])
+
+            # Upload to sources
+            object_name = upload_to_sources(file_info)
+
+        # Copy to bronze (or quarantine)
+        bronze_name = copy_to_bronze_layer(object_name, file_info, schema_info, validation, columnar)
+
+        if bronze_name:
+            return "processed", {
+                "name": bronze_name,
+                "rows": validation.get("row_count", 0),
+                "schema": schema_info.get("entity_type", "unknown"),
+                "warnings": validation.get("warnings", [])
+            }
+        return "quarantined", {
+            "name": file_info["name"],
+            "reason": "validation_failed"
+        }
+
+    except Exception as e:
+        get_run_logger().error(f"Error processing {file_info['name']}: {e}")
+        return "errors", {
+            "name": file_info["name"],
+            "error": str(e)
+        }
+
+
+class _InFlightBytes:
+    """Bound on the total size of the files being processed at once."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._used = 0
+        self._condition = threading.Condition()
+
+    def acquire(self, size: int) -> None:
+        """Wait until `size` more bytes fit; a larger file than the limit runs alone."""
+        with self._condition:
+            self._condition.wait_for(lambda: self._used == 0 or self._used + size <= self.limit)
+            self._used += size
+
+    def release(self, size: int) -> None:
+        with self._condition:
+            self._used -= size
+            self._condition.notify_all()
+
+
+def process_files_concurrently(
+    files: list[dict],
+    single_pass: bool,
+    columnar: bool,
+    max_workers: int,
+    max_in_flight_bytes: int
+) -> list[tuple[str, dict]]:
+    """
+    Run process_source_file on several files at once.
+
+    Files are submitted in order to a bounded thread pool, each once its
+    size fits in max_in_flight_bytes. Each worker runs in a copy of the
+    flow context, so the tasks it calls are recorded under the flow run.
+
+    Returns:
+        Outcomes of process_source_file, in the order of files.
+    """
+    in_flight = _InFlightBytes(max_in_flight_bytes)
+    futures = []
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bronze-ingest") as pool:
+        for file_info in files:
+            size = file_info.get("size", 0)
+            in_flight.acquire(size)
+            future = pool.submit(
+                contextvars.copy_context().run, process_source_file, file_info, single_pass, columnar
+            )
+            future.add_done_callback(lambda _, size=size: in_flight.release(size))
+            futures.append(future)
+        return [future.result() for future in futures]
+
+
 @flow(name="Bronze Ingestion Flow", retries=1)
 def bronze_ingestion_flow(
     data_dir: str = "./data/sources",
     force: bool = False,
-    patterns: Optional[list[str]] = None
+    patterns: Optional[list[str]] = None,
+    single_pass: bool = BRONZE_SINGLE_PASS,
+    columnar: bool = BRONZE_PARQUET,
+    max_workers: int = BRONZE_CONCURRENCY,
+    max_in_flight_mb: int = BRONZE_MAX_IN_FLIGHT_MB,
+    append_deltas: bool = BRONZE_APPEND_DELTAS
 ) -> dict:
     """
     Robust flow to ingest data into the bronze layer.
@@ -319,20 +1202,32 @@ def bronze_ingestion_flow(
     - Idempotency (skip already processed files)
     - Quarantine for invalid files
     - Processing metadata tracking
+    - Optional single-pass mode: each file is read once for hashing,
+      schema inference, validation and upload
+    - Optional typed Parquet copy of each valid file, read by the silver flow
+    - Optional concurrency: several files ingested at once, within a limit
+      on the total size of the files in progress
+    - Append detection: of a file that only grew since it was ingested, the
+      new lines are ingested as a delta object
 
     Args:
         data_dir: Directory containing source files.
         force: Force reprocessing of all files.
-        patterns: File patterns to match (default: ["*.csv"]).
+        patterns: File patterns to match (default: plain and compressed CSV).
+        single_pass: Ingest each file in a single read (ingest_file_single_pass).
+        columnar: Write a typed Parquet copy of each valid file to bronze.
+        max_workers: Number of files ingested at once (1: sequential).
+        max_in_flight_mb: Total size of the files in progress, in MB.
+        append_deltas: Ingest only the new lines of files that were appended to.
 
     Returns:
         Processing results dictionary.
     """
     prefect_logger = get_run_logger()
-    prefect_logger.info(f"Starting Bronze Ingestion Flow (force={force})")
+    prefect_logger.info(f"Starting Bronze Ingestion Flow (force={force}, workers={max_workers})")
 
     # Discover all source files
-    files = discover_source_files(data_dir, patterns)
+    files = discover_source_files(data_dir, patterns, hash_files=not single_pass)
 
     if not files:
         prefect_logger.warning("No source files found!")
@@ -345,49 +1240,31 @@ def bronze_ingestion_flow(
         "errors": []
     }
 
-    for file_info in files:
-        try:
-            # Check idempotency
-            file_info = check_idempotency(file_info, force=force)
-
-            if not file_info.get("should_process", True):
-                results["skipped"].append({
-                    "name": file_info["name"],
-                    "reason": file_info.get("reason", "unknown")
-                })
-                continue
+    # Check idempotency of all files at once
+    files = check_idempotency_batch(files, force=force, append_deltas=append_deltas)
 
-            # Infer and validate schema
-            schema_info = infer_schema(file_info["path"])
-
-            # Validate file content
-            validation = validate_file_content(file_info["path"], schema_info)
-
-            # Upload to sources
-            object_name = upload_to_sources(file_info)
+    to_process = []
+    for file_info in files:
+        if file_info.get("should_process", True):
+            to_process.append(file_info)
+        else:
+            results["skipped"].append({
+                "name": file_info["name"],
+                "reason": file_info.get("reason", "unknown")
+            })
 
-            # Copy to bronze (or quarantine)
-            bronze_name = copy_to_bronze_layer(object_name, file_info, schema_info, validation)
+    if max_workers > 1 and len(to_process) > 1:
+        outcomes = process_files_concurrently(
+            to_process, single_pass, columnar, max_workers, max_in_flight_mb * 1024 * 1024
+        )
+    else:
+        outcomes = [process_source_file(file_info, single_pass, columnar) for file_info in to_process]
 
-            if bronze_name:
-                results["processed"].append({
-                    "name": bronze_name,
-                    "rows": validation.get("row_count", 0),
-                    "schema": schema_info.get("entity_type", "unknown"),
-                    "warnings": validation.get("warnings", [])
-                })
-            else:
-                results["quarantined"].append({
-                    "name": file_info["name"],
-                    "reason": "validation_failed"
-                })
+    for category, entry in outcomes:
+        results[category].append(entry)
 
-        except Exception as e:
-            prefect_logger.error(f"Error processing {file_info['name']}: {e}")
-            results["errors"].append({
-                "name": file_info["name"],
-                "error": str(e)
-            })
+    if results["processed"]:
+        compact_layer_catalog(get_storage(), BUCKET_BRONZE)
 
     # Summary
     prefect_logger.info(f"Bronze Ingestion Complete:")
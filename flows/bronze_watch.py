@@ -0,0 +1,262 @@
+"""
+Watch mode of the bronze ingestion.
+
+The source directory is watched through inotify (with the watchfiles
+package) or, without it, polled. A source file is ingested once it is
+complete: as soon as a <file>.done marker newer than the file exists, or
+once its size and mtime stayed unchanged for WATCH_SETTLE_SECONDS. A file
+appended to more often than that never settles: it is ingested as it is
+once it has been changing for WATCH_MAX_WAIT_SECONDS, only the bytes it had
+then being uploaded. Such feeds should write whole lines, or use markers
+(with WATCH_MAX_WAIT_SECONDS set to 0). Each
+trigger runs the bronze flow on the completed files only; with
+BRONZE_APPEND_DELTAS, lines appended to a file after it was ingested are
+ingested as a delta (detect_append).
+
+The watcher is one long-lived process, so its state stays warm between
+triggers: the stat of each file as last ingested, which keeps unchanged
+files from triggering at all, the file hash cache and the metadata catalog
+cache.
+"""
+import fnmatch
+import glob
+import os
+import threading
+import time
+from typing import Iterator, Optional
+
+from config import (
+    BRONZE_PARQUET,
+    BRONZE_SINGLE_PASS,
+    WATCH_DONE_SUFFIX,
+    WATCH_FORCE_POLLING,
+    WATCH_MAX_WAIT_SECONDS,
+    WATCH_POLL_SECONDS,
+    WATCH_REQUIRE_DONE_MARKER,
+    WATCH_SETTLE_SECONDS,
+    logger,
+)
+from bronze_ingestion import bronze_ingestion_flow
+from parsing import CSV_PATTERNS
+
+try:
+    import watchfiles
+except ImportError:
+    watchfiles = None
+
+# Filesystem events closer than this are handled in one wakeup
+EVENT_DEBOUNCE_MS = 200
+
+
+class SourceDebouncer:
+    """
+    Completion state of the source files of a directory.
+
+    Args:
+        data_dir: Directory of the source files.
+        patterns: File patterns to watch.
+        settle_seconds: Time a file must stay unchanged to be complete.
+        require_marker: Only a .done marker makes a file complete.
+        max_wait_seconds: Time after which a file that keeps changing is
+            complete anyway (0: never).
+    """
+
+    def __init__(
+        self,
+        data_dir: str,
+        patterns: list[str],
+        settle_seconds: float,
+        require_marker: bool,
+        max_wait_seconds: float = 0
+    ):
+        self.data_dir = data_dir
+        self.patterns = patterns
+        self.settle_seconds = settle_seconds
+        self.require_marker = require_marker
+        self.max_wait_seconds = max_wait_seconds
+        # Stat signature of each file when it was last ingested
+        self.ingested: dict[str, tuple] = {}
+        # Stat signature of each changed file, since when it has it and since
+        # when the file has been changing
+        self._pending: dict[str, tuple[tuple, float, float]] = {}
+
+    @staticmethod
+    def signature(st: os.stat_result) -> tuple:
+        """Stat fields that change when a file is written or replaced."""
+        return (st.st_size, st.st_mtime_ns, st.st_ino)
+
+    def _scan(self) -> dict[str, os.stat_result]:
+        stats = {}
+        with os.scandir(self.data_dir) as entries:
+            for entry in entries:
+                if not any(fnmatch.fnmatchcase(entry.name, pattern) for pattern in self.patterns):
+                    continue
+                try:
+                    if entry.is_file():
+                        stats[entry.name] = entry.stat()
+                except FileNotFoundError:
+                    continue
+        return stats
+
+    def _marked_done(self, name: str, st: os.stat_result) -> bool:
+        """Whether the file has a .done marker written after its last change."""
+        try:
+            marker = os.stat(os.path.join(self.data_dir, name + WATCH_DONE_SUFFIX))
+        except FileNotFoundError:
+            return False
+        return marker.st_mtime_ns >= st.st_mtime_ns
+
+    def ready_files(self, now: Optional[float] = None) -> dict[str, tuple]:
+        """
+        Scan the directory for the files complete since they were last ingested.
+
+        Args:
+            now: Monotonic time of the scan (default: now).
+
+        Returns:
+            Stat signature of each complete file, by file name.
+        """
+        now = time.monotonic() if now is None else now
+        stats = self._scan()
+        # A deleted file is new again if it comes back
+        for name in set(self.ingested) - set(stats):
+            del self.ingested[name]
+        for name in set(self._pending) - set(stats):
+            del self._pending[name]
+
+        ready = {}
+        for name, st in stats.items():
+            signature = self.signature(st)
+            if self.ingested.get(name) == signature:
+                self._pending.pop(name, None)
+                continue
+            pending = self._pending.get(name)
+            if pending is None:
+                pending = self._pending[name] = (signature, now, now)
+            elif pending[0] != signature:
+                pending = self._pending[name] = (signature, now, pending[2])
+            settled = not self.require_marker and now - pending[1] >= self.settle_seconds
+            # A file appended to continuously: ingest what it has so far
+            overdue = not self.require_marker and 0 < self.max_wait_seconds <= now - pending[2]
+            if settled or overdue or self._marked_done(name, st):
+                ready[name] = signature
+        return ready
+
+    def mark_ingested(self, name: str, signature: tuple) -> None:
+        """Remember that a file was ingested while it had this signature."""
+        self.ingested[name] = signature
+        self._pending.pop(name, None)
+
+
+def _wakeups(data_dir: str, poll_seconds: float, force_polling: bool, stop_event: threading.Event) -> Iterator[None]:
+    """Yield at start, on filesystem events in data_dir, and at least every poll_seconds."""
+    yield
+    if watchfiles is not None and not force_polling:
+        try:
+            for _ in watchfiles.watch(
+                data_dir,
+                watch_filter=None,
+                debounce=EVENT_DEBOUNCE_MS,
+                rust_timeout=max(1, int(poll_seconds * 1000)),
+                yield_on_timeout=True,
+                stop_event=stop_event,
+                recursive=False
+            ):
+                yield
+            return
+        except OSError as e:
+            logger.warning(f"Cannot watch {data_dir} ({e}), polling it instead")
+
+    while not stop_event.wait(poll_seconds):
+        yield
+
+
+def ingest_ready_files(
+    debouncer: SourceDebouncer,
+    ready: dict[str, tuple],
+    single_pass: bool,
+    columnar: bool
+) -> dict:
+    """
+    Run the bronze flow on the complete files only.
+
+    Files that ended in error are not retried until they change again.
+
+    Returns:
+        Processing results of the flow.
+    """
+    names = sorted(ready)
+    logger.info(f"Ingesting {', '.join(names)}")
+    result = bronze_ingestion_flow(
+        data_dir=debouncer.data_dir,
+        patterns=[glob.escape(name) for name in names],
+        single_pass=single_pass,
+        columnar=columnar
+    )
+    for name, signature in ready.items():
+        debouncer.mark_ingested(name, signature)
+    return result
+
+
+def watch_bronze_sources(
+    data_dir: str = "./data/sources",
+    patterns: Optional[list[str]] = None,
+    settle_seconds: float = WATCH_SETTLE_SECONDS,
+    max_wait_seconds: float = WATCH_MAX_WAIT_SECONDS,
+    poll_seconds: float = WATCH_POLL_SECONDS,
+    require_marker: bool = WATCH_REQUIRE_DONE_MARKER,
+    force_polling: bool = WATCH_FORCE_POLLING,
+    single_pass: bool = BRONZE_SINGLE_PASS,
+    columnar: bool = BRONZE_PARQUET,
+    stop_event: Optional[threading.Event] = None
+) -> None:
+    """
+    Ingest source files into bronze as they arrive, until stop_event is set.
+
+    The files already in the directory are checked first, so those that
+    arrived while nothing was watching are ingested too.
+
+    Args:
+        data_dir: Directory containing source files.
+        patterns: File patterns to watch (default: plain and compressed CSV).
+        settle_seconds: Time a file must stay unchanged to be ingested.
+        max_wait_seconds: Time after which a file that keeps changing is
+            ingested anyway (0: never).
+        poll_seconds: Interval of the checks without filesystem events.
+        require_marker: Only ingest files with a .done marker.
+        force_polling: Poll the directory even if inotify is available.
+        single_pass: Ingest each file in a single read.
+        columnar: Write a typed Parquet copy of each valid file to bronze.
+        stop_event: Event that ends the watch (default: runs until interrupted).
+    """
+    stop_event = stop_event or threading.Event()
+    debouncer = SourceDebouncer(
+        data_dir, patterns or CSV_PATTERNS, settle_seconds, require_marker, max_wait_seconds
+    )
+    mode = "polling" if watchfiles is None or force_polling else "inotify"
+    logger.info(f"Watching {data_dir} ({mode}, settle {settle_seconds}s)")
+
+    for _ in _wakeups(data_dir, poll_seconds, force_polling, stop_event):
+        if stop_event.is_set():
+            break
+        ready = debouncer.ready_files()
+        if not ready:
+            continue
+        try:
+            result = ingest_ready_files(debouncer, ready, single_pass, columnar)
+        except Exception as e:
+            # Storage unavailable or the like: try again after a pause
+            logger.error(f"Bronze ingestion of {', '.join(sorted(ready))} failed: {e}")
+            stop_event.wait(settle_seconds)
+            continue
+        logger.info(
+            f"Processed: {len(result['processed'])}, skipped: {len(result['skipped'])}, "
+            f"quarantined: {len(result['quarantined'])}, errors: {len(result['errors'])}"
+        )
+
+
+if __name__ == "__main__":
+    try:
+        watch_bronze_sources()
+    except KeyboardInterrupt:
+        print("\nWatch mode stopped")
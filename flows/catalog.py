@@ -0,0 +1,516 @@
+"""
+Metadata catalog of the pipeline layers.
+
+Processing metadata is stored per layer in the metadata bucket:
+- _catalog/<layer>/snapshot.json: compacted manifest {object_name: record}
+- _catalog/<layer>/log/<timestamp>-<id>.jsonl: records written after the
+  snapshot, one JSON document per line
+
+A write adds one immutable log object. A single PUT is atomic, so
+concurrent writers never overwrite each other's records. Reading a layer
+fetches the snapshot, lists the log and applies the entries the snapshot
+does not list as applied, so a whole layer costs a GET and a LIST instead
+of one GET per object. The log is folded into a new snapshot every
+CATALOG_COMPACT_EVERY writes of a process, and at the end of each flow.
+
+Log keys sort by write time, but an entry of another process may land
+after a compaction listed the log with a key that sorts earlier. Snapshots
+therefore record the exact keys they applied rather than a position in the
+log, and a record only replaces an older one (by processed_at).
+
+Parsed metadata objects are kept in a bounded in-process LRU cache. Log
+entries are immutable and served from it directly; snapshots and legacy
+records are revalidated with a conditional GET on their ETag.
+"""
+import copy
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Optional
+
+from config import (
+    BUCKET_BRONZE,
+    BUCKET_GOLD,
+    BUCKET_METADATA,
+    BUCKET_SILVER,
+    CATALOG_COMPACT_EVERY,
+    CATALOG_LEGACY_FALLBACK,
+    HASH_ALGORITHM,
+    METADATA_CACHE_SIZE,
+    logger,
+)
+from parsing import is_csv_name
+from storage import ObjectNotFoundError, PreconditionFailedError, StorageBackend
+
+CATALOG_PREFIX = "_catalog"
+LEGACY_SUFFIX = ".metadata.json"
+
+# Legacy records of this many objects or more are found by one listing of
+# the metadata bucket, then read on LEGACY_READ_WORKERS threads
+LEGACY_LIST_MIN_OBJECTS = 8
+LEGACY_READ_WORKERS = 16
+
+_writes_since_compaction: dict[str, int] = {}
+_writes_lock = threading.Lock()
+
+
+class MetadataCache:
+    """Bounded LRU cache of parsed metadata objects and their ETag."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: OrderedDict[str, tuple[str, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "revalidated": 0, "misses": 0, "invalidations": 0}
+
+    def get(self, key: str) -> Optional[tuple[str, Any]]:
+        """Return (etag, value) for a key, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: str, etag: str, value: Any) -> None:
+        """Store a value, evicting the least recently used entries."""
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (etag, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key: str) -> None:
+        """Drop a key from the cache."""
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self.stats["invalidations"] += 1
+
+    def count(self, outcome: str) -> None:
+        """Increment a statistics counter."""
+        with self._lock:
+            self.stats[outcome] += 1
+
+    def clear(self) -> None:
+        """Drop all entries."""
+        with self._lock:
+            self._entries.clear()
+
+
+_cache = MetadataCache(METADATA_CACHE_SIZE)
+
+
+def get_metadata_cache_stats() -> dict:
+    """Return the hit/miss counters and the size of the metadata cache."""
+    with _cache._lock:
+        return {**_cache.stats, "size": len(_cache._entries), "max_size": _cache.max_size}
+
+
+def clear_metadata_cache() -> None:
+    """Drop all cached metadata, e.g. after the bucket was changed externally."""
+    _cache.clear()
+
+
+def snapshot_key(layer: str) -> str:
+    """Key of the compacted snapshot of a layer."""
+    return f"{CATALOG_PREFIX}/{layer}/snapshot.json"
+
+
+def log_prefix(layer: str) -> str:
+    """Prefix of the log entries of a layer."""
+    return f"{CATALOG_PREFIX}/{layer}/log/"
+
+
+def _read_metadata_object(
+    storage: StorageBackend,
+    key: str,
+    parse: Callable[[bytes], Any],
+    immutable: bool = False
+) -> Optional[Any]:
+    """
+    Read and parse an object of the metadata bucket through the cache.
+
+    Args:
+        storage: Storage backend.
+        key: Object key.
+        parse: Function turning the object bytes into the cached value.
+        immutable: The object never changes once written (log entries),
+            so a cached copy is returned without revalidation.
+
+    Returns:
+        Parsed value, or None if the object does not exist. Any other
+        failure to read it is raised.
+    """
+    return _read_metadata_object_with_etag(storage, key, parse, immutable)[0]
+
+
+def _read_metadata_object_with_etag(
+    storage: StorageBackend,
+    key: str,
+    parse: Callable[[bytes], Any],
+    immutable: bool = False
+) -> tuple[Optional[Any], Optional[str]]:
+    """As _read_metadata_object, also returning the ETag of the object read (None if missing)."""
+    cached = _cache.get(key)
+    if cached is not None and immutable:
+        _cache.count("hits")
+        return cached[1], cached[0]
+
+    try:
+        data, etag = storage.get_with_etag(
+            BUCKET_METADATA,
+            key,
+            if_none_match=cached[0] if cached is not None else None
+        )
+    except ObjectNotFoundError:
+        if cached is not None:
+            _cache.invalidate(key)
+        return None, None
+
+    if data is None:
+        _cache.count("revalidated")
+        return cached[1], cached[0]
+
+    _cache.count("misses")
+    value = parse(data)
+    if etag:
+        _cache.put(key, etag, value)
+    return value, etag
+
+
+def _parse_json(data: bytes) -> Any:
+    """Parse a JSON document."""
+    return json.loads(data.decode("utf-8"))
+
+
+def _put_object_bytes(storage: StorageBackend, key: str, data: bytes, content_type: str) -> str:
+    """Upload an object to the metadata bucket and return its ETag."""
+    return storage.put(BUCKET_METADATA, key, data, content_type=content_type)
+
+
+def _parse_log(data: bytes) -> list[dict]:
+    """Parse the records of a JSON-lines log entry."""
+    return [json.loads(line) for line in data.decode("utf-8").splitlines() if line.strip()]
+
+
+def _list_log_keys(storage: StorageBackend, layer: str) -> list[str]:
+    """List the log entry keys of a layer, oldest first."""
+    return sorted(
+        obj.key
+        for obj in storage.list_objects(BUCKET_METADATA, prefix=log_prefix(layer), recursive=True)
+    )
+
+
+def _read_snapshot(storage: StorageBackend, layer: str) -> tuple[dict, Optional[str]]:
+    """
+    Read the snapshot of a layer, or an empty one if it does not exist.
+
+    Returns:
+        Tuple of (snapshot, its ETag or None if it does not exist).
+    """
+    snapshot, etag = _read_metadata_object_with_etag(storage, snapshot_key(layer), _parse_json)
+    if snapshot is None:
+        return {"layer": layer, "applied_log_keys": [], "entries": {}}, None
+    return snapshot, etag
+
+
+def _snapshot_applied(snapshot: dict, log_keys: list[str]) -> set[str]:
+    """Keys among log_keys whose records a snapshot already holds."""
+    if "applied_log_keys" in snapshot:
+        return set(snapshot["applied_log_keys"]) & set(log_keys)
+    # Snapshots written before the applied keys were recorded
+    compacted_through = snapshot.get("compacted_through", "")
+    return {key for key in log_keys if key <= compacted_through}
+
+
+def _fold_log(storage: StorageBackend, layer: str, snapshot: dict) -> tuple[dict[str, dict], list[str], list[str]]:
+    """
+    Apply the log entries a snapshot does not hold yet.
+
+    Returns:
+        Tuple of (entries by object name, keys of the log entries applied
+        now, keys of the listed log entries the snapshot already held).
+    """
+    entries = dict(snapshot.get("entries", {}))
+    log_keys = _list_log_keys(storage, layer)
+    held = _snapshot_applied(snapshot, log_keys)
+
+    applied = []
+    for key in log_keys:
+        if key in held:
+            continue
+        records = _read_metadata_object(storage, key, _parse_log, immutable=True)
+        if records is None:
+            # Removed by a concurrent compaction, so already in a newer snapshot
+            continue
+        for record in records:
+            current = entries.get(record["object_name"])
+            # An entry that landed late must not undo a more recent record
+            if current is None or record.get("processed_at", "") >= current.get("processed_at", ""):
+                entries[record["object_name"]] = record
+        applied.append(key)
+
+    return entries, applied, sorted(held)
+
+
+def load_layer_catalog(storage: StorageBackend, layer: str) -> dict[str, dict]:
+    """
+    Load all processing metadata of a layer.
+
+    Args:
+        storage: Storage backend.
+        layer: Layer name (bronze, silver, gold).
+
+    Returns:
+        Dictionary of metadata records by object name. The records are
+        shared with the cache and must not be modified.
+    """
+    entries, _, _ = _fold_log(storage, layer, _read_snapshot(storage, layer)[0])
+    return entries
+
+
+def _read_legacy_metadata(storage: StorageBackend, object_name: str) -> Optional[dict]:
+    """Read a per-object <object_name>.metadata.json record."""
+    return _read_metadata_object(storage, f"{object_name}{LEGACY_SUFFIX}", _parse_json)
+
+
+def get_layer_metadata(
+    storage: StorageBackend,
+    bucket: str,
+    object_names: list[str]
+) -> dict[str, Optional[dict]]:
+    """
+    Retrieve the processing metadata of several objects of a layer at once.
+
+    Args:
+        storage: Storage backend.
+        bucket: Layer bucket of the objects.
+        object_names: Names of the objects.
+
+    Returns:
+        Dictionary of metadata (or None) by object name.
+    """
+    catalog = load_layer_catalog(storage, bucket)
+
+    result = {object_name: copy.deepcopy(catalog.get(object_name)) for object_name in object_names}
+    missing = [object_name for object_name, record in result.items() if record is None]
+    if missing and CATALOG_LEGACY_FALLBACK:
+        for object_name, record in _read_legacy_records(storage, missing).items():
+            result[object_name] = copy.deepcopy(record)
+    return result
+
+
+def _read_legacy_records(storage: StorageBackend, object_names: list[str]) -> dict[str, Optional[dict]]:
+    """
+    Read the legacy records of several objects.
+
+    Past a few objects, the legacy keys that exist are listed in one
+    request and only those are read, concurrently.
+    """
+    if len(object_names) < LEGACY_LIST_MIN_OBJECTS:
+        return {object_name: _read_legacy_metadata(storage, object_name) for object_name in object_names}
+
+    # Legacy records sit at the root of the metadata bucket
+    existing = {
+        obj.key[:-len(LEGACY_SUFFIX)]
+        for obj in storage.list_objects(BUCKET_METADATA)
+        if not obj.is_dir and obj.key.endswith(LEGACY_SUFFIX)
+    }
+    found = [object_name for object_name in object_names if object_name in existing]
+    records = dict.fromkeys(object_names)
+    if found:
+        with ThreadPoolExecutor(max_workers=min(LEGACY_READ_WORKERS, len(found))) as pool:
+            records.update(zip(found, pool.map(lambda name: _read_legacy_metadata(storage, name), found)))
+    return records
+
+
+def get_processing_metadata(storage: StorageBackend, bucket: str, object_name: str) -> Optional[dict]:
+    """Retrieve processing metadata for an object."""
+    return get_layer_metadata(storage, bucket, [object_name])[object_name]
+
+
+def append_catalog_records(storage: StorageBackend, layer: str, records: list[dict]) -> str:
+    """
+    Append metadata records to the log of a layer in one atomic write.
+
+    Args:
+        storage: Storage backend.
+        layer: Layer name.
+        records: Metadata records, each with an object_name.
+
+    Returns:
+        Key of the written log entry.
+    """
+    storage.ensure_bucket(BUCKET_METADATA)
+
+    data = "".join(json.dumps(record) + "\n" for record in records).encode("utf-8")
+    # Keys sort by write time; the random suffix keeps concurrent writers apart
+    key = f"{log_prefix(layer)}{time.time_ns():020d}-{uuid.uuid4().hex[:12]}.jsonl"
+    etag = _put_object_bytes(storage, key, data, "application/x-ndjson")
+    _cache.put(key, etag, _parse_log(data))
+
+    with _writes_lock:
+        _writes_since_compaction[layer] = _writes_since_compaction.get(layer, 0) + 1
+        should_compact = _writes_since_compaction[layer] >= CATALOG_COMPACT_EVERY
+    if should_compact:
+        compact_layer_catalog(storage, layer)
+
+    return key
+
+
+def save_processing_metadata(
+    storage: StorageBackend,
+    object_name: str,
+    source_hash: str,
+    row_count: int,
+    status: str = "processed",
+    extra: Optional[dict] = None,
+    layer: Optional[str] = None,
+    hash_algorithm: Optional[str] = None
+) -> None:
+    """
+    Save processing metadata for tracking.
+
+    The record goes to the catalog of `layer`, which defaults to
+    extra["layer"]. hash_algorithm is that of source_hash (default:
+    HASH_ALGORITHM).
+    """
+    metadata = {
+        "object_name": object_name,
+        "source_hash": source_hash,
+        "row_count": row_count,
+        "status": status,
+        "hash_algorithm": hash_algorithm or HASH_ALGORITHM,
+        "processed_at": datetime.now().isoformat(),
+        "pipeline_version": "2.0"
+    }
+    if extra:
+        metadata.update(extra)
+
+    layer = layer or metadata.get("layer") or guess_layer(object_name)
+    append_catalog_records(storage, layer, [metadata])
+    # A cached legacy record of the object is superseded by this write
+    _cache.invalidate(f"{object_name}{LEGACY_SUFFIX}")
+    logger.info(f"Saved metadata for {object_name}")
+
+
+def compact_layer_catalog(storage: StorageBackend, layer: str) -> Optional[int]:
+    """
+    Fold the log of a layer into a new snapshot.
+
+    Log entries are removed one compaction late: only those the previous
+    snapshot lists as applied are deleted. A reader or a concurrent
+    compaction that still relies on the previous snapshot therefore never
+    misses a record, and an entry that landed after the log was listed
+    stays until a snapshot holds it.
+
+    Nothing is written when the previous snapshot or the log cannot be
+    read: a snapshot built without them would lose the records they hold.
+    The new snapshot only replaces the one it was built from (conditional
+    write on its ETag): when another compaction got there first, this one
+    stops before deleting anything, since the log entries it would delete
+    may already be gone from that newer snapshot's base.
+
+    Args:
+        storage: Storage backend.
+        layer: Layer name.
+
+    Returns:
+        Number of entries in the new snapshot, or None if not compacted.
+    """
+    storage.ensure_bucket(BUCKET_METADATA)
+
+    try:
+        previous, previous_etag = _read_snapshot(storage, layer)
+        entries, applied, held = _fold_log(storage, layer, previous)
+    except Exception as e:
+        logger.error(f"Not compacting {layer} catalog, it could not be read: {e}")
+        return None
+
+    with _writes_lock:
+        _writes_since_compaction[layer] = 0
+
+    if applied:
+        snapshot = {
+            "layer": layer,
+            "applied_log_keys": held + applied,
+            "compacted_at": datetime.now().isoformat(),
+            "entries": entries
+        }
+        data = json.dumps(snapshot).encode("utf-8")
+        try:
+            etag = storage.put_if_match(
+                BUCKET_METADATA, snapshot_key(layer), data, previous_etag, content_type="application/json"
+            )
+        except PreconditionFailedError:
+            logger.warning(f"Not compacting {layer} catalog, another compaction replaced its snapshot")
+            return None
+        _cache.put(snapshot_key(layer), etag, snapshot)
+
+    if held:
+        for key in held:
+            _cache.invalidate(key)
+        storage.delete(BUCKET_METADATA, held)
+
+    logger.info(f"Compacted {layer} catalog: {len(entries)} entries, {len(applied)} log entries folded")
+    return len(entries)
+
+
+def guess_layer(object_name: str) -> str:
+    """Guess the layer of a record that does not say which one it belongs to."""
+    if is_csv_name(object_name):
+        return BUCKET_BRONZE
+    if object_name.startswith(("dim_", "fact_", "kpi_")):
+        return BUCKET_GOLD
+    return BUCKET_SILVER
+
+
+def migrate_legacy_metadata(storage: StorageBackend) -> dict[str, int]:
+    """
+    Import per-object .metadata.json records into the catalog.
+
+    Records already in the catalog are kept when they are more recent.
+    Legacy objects are left in place.
+
+    Returns:
+        Number of migrated records per layer.
+    """
+    storage.ensure_bucket(BUCKET_METADATA)
+
+    by_layer: dict[str, list[dict]] = {}
+    for obj in storage.list_objects(BUCKET_METADATA):
+        if not obj.key.endswith(LEGACY_SUFFIX):
+            continue
+        object_name = obj.key[:-len(LEGACY_SUFFIX)]
+        record = _read_legacy_metadata(storage, object_name)
+        if record is None:
+            continue
+        record.setdefault("object_name", object_name)
+        by_layer.setdefault(record.get("layer") or guess_layer(object_name), []).append(record)
+
+    migrated = {}
+    for layer, records in by_layer.items():
+        current = load_layer_catalog(storage, layer)
+        records = [
+            record for record in records
+            if record["object_name"] not in current
+            or current[record["object_name"]].get("processed_at", "") < record.get("processed_at", "")
+        ]
+        if records:
+            append_catalog_records(storage, layer, records)
+        compact_layer_catalog(storage, layer)
+        migrated[layer] = len(records)
+        logger.info(f"Migrated {len(records)} legacy metadata records to the {layer} catalog")
+
+    return migrated
+
+
+if __name__ == "__main__":
+    from storage import get_storage
+
+    print(migrate_legacy_metadata(get_storage()))
@@ -1,15 +1,16 @@
 import os
-import hashlib
-import json
 import logging
-from datetime import datetime
-from io import BytesIO
+import socket
+import threading
 from pathlib import Path
 from typing import Any, Optional
 
+import certifi
+import urllib3
 from dotenv import load_dotenv
 from minio import Minio
-from pymongo import MongoClient
+from minio.error import S3Error
+from pymongo import MongoClient, monitoring
 from pymongo.database import Database
 
 load_dotenv()
@@ -26,6 +27,15 @@ MINIO_ENDPOINT = os.getenv("MINIO_ENDPOINT", "localhost:9000")
 MINIO_ACCESS_KEY = os.getenv("MINIO_ACCESS_KEY", "minioadmin")
 MINIO_SECRET_KEY = os.getenv("MINIO_SECRET_KEY", "minioadmin")
 MINIO_SECURE = os.getenv("MINIO_SECURE", "False").lower() == "true"
+# HTTP connection pool shared by all tasks of a process. The pool should be
+# at least as large as the number of tasks running concurrently in a worker.
+MINIO_POOL_MAXSIZE = int(os.getenv("MINIO_POOL_MAXSIZE", "32"))
+MINIO_CONNECT_TIMEOUT = float(os.getenv("MINIO_CONNECT_TIMEOUT", "10"))
+MINIO_READ_TIMEOUT = float(os.getenv("MINIO_READ_TIMEOUT", "300"))
+# TCP keep-alive probes on idle pooled connections (seconds)
+MINIO_KEEPALIVE_IDLE = int(os.getenv("MINIO_KEEPALIVE_IDLE", "60"))
+MINIO_KEEPALIVE_INTERVAL = int(os.getenv("MINIO_KEEPALIVE_INTERVAL", "15"))
+MINIO_KEEPALIVE_COUNT = int(os.getenv("MINIO_KEEPALIVE_COUNT", "4"))
 
 # Database configuration
 SQLITE_DB_PATH = os.getenv("SQLITE_DB_PATH", "./data/database/analytics.db")
@@ -43,6 +53,10 @@ MONGO_URI = os.getenv(
     "MONGO_URI",
     f"mongodb://{MONGO_USER}:{MONGO_PASSWORD}@{MONGO_HOST}:{MONGO_PORT}/"
 )
+# Connection pool of the process-wide MongoClient
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+MONGO_MAX_IDLE_TIME_MS = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "300000"))
 
 # Buckets
 BUCKET_SOURCES = "sources"
@@ -52,6 +66,73 @@ BUCKET_GOLD = "gold"
 BUCKET_QUARANTINE = "quarantine"
 BUCKET_METADATA = "metadata"
 
+# Storage backend of the layers (see storage.py): "minio", or "local" to keep
+# every bucket as a directory under LOCAL_STORAGE_ROOT
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "minio").lower()
+LOCAL_STORAGE_ROOT = os.getenv("LOCAL_STORAGE_ROOT", "./data/storage")
+
+# Bronze ingestion reads each file once for hashing, schema inference,
+# validation and upload (see bronze_ingestion.ingest_file_single_pass)
+BRONZE_SINGLE_PASS = os.getenv("BRONZE_SINGLE_PASS", "False").lower() == "true"
+# Memory budget of the validation of one bronze file, in MB: half for the
+# parsed chunk, half for the primary keys (spilled to disk beyond it)
+VALIDATION_MEMORY_BUDGET_MB = int(os.getenv("VALIDATION_MEMORY_BUDGET_MB", "512"))
+# Bytes of CSV text the Arrow reader parses per block (see parsing.py)
+CSV_BLOCK_SIZE = int(os.getenv("CSV_BLOCK_SIZE", str(16 * 1024 * 1024)))
+# Number of files the bronze flow ingests at once (1: one after another),
+# and the total size in MB of the files in progress at any time
+BRONZE_CONCURRENCY = int(os.getenv("BRONZE_CONCURRENCY", "1"))
+BRONZE_MAX_IN_FLIGHT_MB = int(os.getenv("BRONZE_MAX_IN_FLIGHT_MB", "1024"))
+# Write a typed Parquet copy of each valid bronze file next to the raw CSV,
+# which the silver flow reads instead of parsing the CSV again
+BRONZE_PARQUET = os.getenv("BRONZE_PARQUET", "False").lower() == "true"
+# Ingest only the lines appended to a file since it was last ingested, as a
+# delta object under BRONZE_DELTA_PREFIX, instead of the whole file again
+BRONZE_APPEND_DELTAS = os.getenv("BRONZE_APPEND_DELTAS", "False").lower() == "true"
+BRONZE_DELTA_PREFIX = "deltas/"
+# Watch mode (see bronze_watch.py): a source file is ingested once its size
+# and mtime stayed unchanged for WATCH_SETTLE_SECONDS, or as soon as a
+# <file>.done marker newer than the file exists (only then, with
+# WATCH_REQUIRE_DONE_MARKER). A file that keeps changing is ingested as it
+# is after WATCH_MAX_WAIT_SECONDS (0: never, it needs a marker). Without a
+# filesystem event the directory is checked again every WATCH_POLL_SECONDS;
+# WATCH_FORCE_POLLING does without inotify altogether.
+WATCH_SETTLE_SECONDS = float(os.getenv("WATCH_SETTLE_SECONDS", "2"))
+WATCH_MAX_WAIT_SECONDS = float(os.getenv("WATCH_MAX_WAIT_SECONDS", "60"))
+WATCH_POLL_SECONDS = float(os.getenv("WATCH_POLL_SECONDS", "1"))
+WATCH_DONE_SUFFIX = ".done"
+WATCH_REQUIRE_DONE_MARKER = os.getenv("WATCH_REQUIRE_DONE_MARKER", "False").lower() == "true"
+WATCH_FORCE_POLLING = os.getenv("WATCH_FORCE_POLLING", "False").lower() == "true"
+# Source files above MULTIPART_THRESHOLD_MB are uploaded in parts of
+# UPLOAD_PART_SIZE_MB, UPLOAD_WORKERS parts at once, each part retried up to
+# UPLOAD_PART_RETRIES times
+MULTIPART_THRESHOLD_MB = int(os.getenv("MULTIPART_THRESHOLD_MB", "64"))
+UPLOAD_PART_SIZE_MB = int(os.getenv("UPLOAD_PART_SIZE_MB", "16"))
+UPLOAD_WORKERS = int(os.getenv("UPLOAD_WORKERS", "4"))
+UPLOAD_PART_RETRIES = int(os.getenv("UPLOAD_PART_RETRIES", "3"))
+
+# Metadata catalog (see catalog.py): fold the log of a layer into its snapshot
+# after this many writes from one process.
+CATALOG_COMPACT_EVERY = int(os.getenv("CATALOG_COMPACT_EVERY", "20"))
+# Fall back to legacy per-object .metadata.json records missing from the
+# catalog. Can be disabled once catalog.migrate_legacy_metadata has run.
+CATALOG_LEGACY_FALLBACK = os.getenv("CATALOG_LEGACY_FALLBACK", "True").lower() == "true"
+# Number of parsed metadata objects kept in the in-process LRU cache (0 disables it)
+METADATA_CACHE_SIZE = int(os.getenv("METADATA_CACHE_SIZE", "256"))
+
+# Hashing (see hashing.py): algorithm of new hashes (md5, sha256, blake2b,
+# or xxh3_64/xxh3_128 with the xxhash package), read slice size and number
+# of files hashed in parallel
+HASH_ALGORITHM = os.getenv("HASH_ALGORITHM", "blake2b")
+HASH_CHUNK_SIZE = int(os.getenv("HASH_CHUNK_SIZE", str(8 * 1024 * 1024)))
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(min(8, os.cpu_count() or 1))))
+# Local index of file digests keyed by path, size, mtime and inode, so
+# unchanged files are not read again (empty to disable)
+HASH_CACHE_PATH = os.getenv(
+    "HASH_CACHE_PATH",
+    os.path.join(os.path.expanduser("~"), ".cache", "big-data-pipeline", "file_hashes.json")
+)
+
 # Expected schemas for validation
 SCHEMAS = {
     "clients": {
@@ -85,19 +166,190 @@ VALIDATION_RULES = {
 }
 
 
-def get_minio_client() -> Minio:
-    """Initialize and return a MinIO client."""
-    return Minio(
-        MINIO_ENDPOINT,
-        access_key=MINIO_ACCESS_KEY,
-        secret_key=MINIO_SECRET_KEY,
-        secure=MINIO_SECURE
+_minio_client: Optional[Minio] = None
+_minio_client_pid: Optional[int] = None
+_minio_lock = threading.Lock()
+
+
+def _build_minio_http_client() -> urllib3.PoolManager:
+    """Build the urllib3 pool used by the shared MinIO client."""
+    socket_options = urllib3.connection.HTTPConnection.default_socket_options + [
+        (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+    ]
+    # Keep-alive tuning is only available on some platforms (Linux)
+    if hasattr(socket, "TCP_KEEPIDLE"):
+        socket_options += [
+            (socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, MINIO_KEEPALIVE_IDLE),
+            (socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, MINIO_KEEPALIVE_INTERVAL),
+            (socket.IPPROTO_TCP, socket.TCP_KEEPCNT, MINIO_KEEPALIVE_COUNT),
+        ]
+
+    # Same retry and TLS settings as the default client built by Minio
+    return urllib3.PoolManager(
+        timeout=urllib3.Timeout(connect=MINIO_CONNECT_TIMEOUT, read=MINIO_READ_TIMEOUT),
+        maxsize=MINIO_POOL_MAXSIZE,
+        cert_reqs="CERT_REQUIRED",
+        ca_certs=os.environ.get("SSL_CERT_FILE") or certifi.where(),
+        retries=urllib3.Retry(
+            total=5,
+            backoff_factor=0.2,
+            status_forcelist=[500, 502, 503, 504]
+        ),
+        socket_options=socket_options
     )
 
 
+def get_minio_client() -> Minio:
+    """
+    Return the process-wide MinIO client.
+
+    The client and its connection pool are created once per process and
+    shared by all tasks; Minio clients are thread-safe. A forked child
+    process gets its own client, as urllib3 pools must not cross a fork.
+    """
+    global _minio_client, _minio_client_pid
+
+    pid = os.getpid()
+    if _minio_client is None or _minio_client_pid != pid:
+        with _minio_lock:
+            if _minio_client is None or _minio_client_pid != pid:
+                _minio_client = Minio(
+                    MINIO_ENDPOINT,
+                    access_key=MINIO_ACCESS_KEY,
+                    secret_key=MINIO_SECRET_KEY,
+                    secure=MINIO_SECURE,
+                    http_client=_build_minio_http_client()
+                )
+                _minio_client_pid = pid
+    return _minio_client
+
+
+def reset_minio_client() -> None:
+    """Drop the shared MinIO client; the next get_minio_client() builds a new one."""
+    global _minio_client, _minio_client_pid
+
+    with _minio_lock:
+        _minio_client = None
+        _minio_client_pid = None
+
+
+class _MongoPoolStatsListener(monitoring.ConnectionPoolListener):
+    """Count connection pool events of the shared MongoClient, per server."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._servers: dict[str, dict[str, int]] = {}
+
+    def _incr(self, address: tuple, **counters: int) -> None:
+        key = f"{address[0]}:{address[1]}"
+        with self._lock:
+            stats = self._servers.setdefault(key, {
+                "connections_open": 0,
+                "connections_in_use": 0,
+                "connections_created": 0,
+                "connections_closed": 0,
+                "checkouts": 0,
+                "checkout_failures": 0,
+                "pool_clears": 0,
+            })
+            for name, value in counters.items():
+                stats[name] += value
+
+    def snapshot(self) -> dict[str, dict[str, int]]:
+        with self._lock:
+            return {server: dict(stats) for server, stats in self._servers.items()}
+
+    def pool_created(self, event) -> None:
+        self._incr(event.address)
+
+    def pool_ready(self, event) -> None:
+        pass
+
+    def pool_cleared(self, event) -> None:
+        self._incr(event.address, pool_clears=1)
+
+    def pool_closed(self, event) -> None:
+        pass
+
+    def connection_created(self, event) -> None:
+        self._incr(event.address, connections_created=1, connections_open=1)
+
+    def connection_ready(self, event) -> None:
+        pass
+
+    def connection_closed(self, event) -> None:
+        self._incr(event.address, connections_closed=1, connections_open=-1)
+
+    def connection_check_out_started(self, event) -> None:
+        pass
+
+    def connection_check_out_failed(self, event) -> None:
+        self._incr(event.address, checkout_failures=1)
+
+    def connection_checked_out(self, event) -> None:
+        self._incr(event.address, checkouts=1, connections_in_use=1)
+
+    def connection_checked_in(self, event) -> None:
+        self._incr(event.address, connections_in_use=-1)
+
+
+_mongo_client: Optional[MongoClient] = None
+_mongo_client_pid: Optional[int] = None
+_mongo_pool_stats = _MongoPoolStatsListener()
+_mongo_lock = threading.Lock()
+
+
 def get_mongo_client() -> MongoClient:
-    """Initialize and return a MongoDB client."""
-    return MongoClient(MONGO_URI)
+    """
+    Return the process-wide MongoDB client.
+
+    MongoClient is thread-safe and owns a connection pool, so one client is
+    created per process and reused by every task and API request. A forked
+    child process gets its own client, as MongoClient is not fork-safe.
+    """
+    global _mongo_client, _mongo_client_pid
+
+    pid = os.getpid()
+    if _mongo_client is None or _mongo_client_pid != pid:
+        with _mongo_lock:
+            if _mongo_client is None or _mongo_client_pid != pid:
+                _mongo_client = MongoClient(
+                    MONGO_URI,
+                    maxPoolSize=MONGO_MAX_POOL_SIZE,
+                    minPoolSize=MONGO_MIN_POOL_SIZE,
+                    maxIdleTimeMS=MONGO_MAX_IDLE_TIME_MS,
+                    event_listeners=[_mongo_pool_stats]
+                )
+                _mongo_client_pid = pid
+    return _mongo_client
+
+
+def close_mongo_client() -> None:
+    """Close the process-wide MongoDB client and its connection pool."""
+    global _mongo_client, _mongo_client_pid
+
+    with _mongo_lock:
+        if _mongo_client is not None and _mongo_client_pid == os.getpid():
+            _mongo_client.close()
+            logger.info("Closed MongoDB client")
+        _mongo_client = None
+        _mongo_client_pid = None
+
+
+def get_mongo_pool_stats() -> dict:
+    """
+    Return connection pool statistics of the process-wide MongoDB client.
+
+    Returns:
+        Pool configuration and per-server counters: open and in-use
+        connections, connections created/closed, checkouts and failures.
+    """
+    return {
+        "client_initialized": _mongo_client is not None,
+        "max_pool_size": MONGO_MAX_POOL_SIZE,
+        "min_pool_size": MONGO_MIN_POOL_SIZE,
+        "servers": _mongo_pool_stats.snapshot()
+    }
 
 
 def get_mongo_database() -> Database:
@@ -106,120 +358,79 @@ def get_mongo_database() -> Database:
     return client[MONGO_DATABASE]
 
 
-def ensure_bucket_exists(client: Minio, bucket_name: str) -> None:
-    """Create bucket if it doesn't exist."""
-    if not client.bucket_exists(bucket_name):
-        client.make_bucket(bucket_name)
-        logger.info(f"Created bucket: {bucket_name}")
-
+_known_buckets: Optional[set[str]] = None
+_known_buckets_pid: Optional[int] = None
+_buckets_lock = threading.Lock()
 
-def calculate_file_hash(file_path: str) -> str:
-    """Calculate MD5 hash of a file for idempotency checks."""
-    hash_md5 = hashlib.md5()
-    with open(file_path, "rb") as f:
-        for chunk in iter(lambda: f.read(4096), b""):
-            hash_md5.update(chunk)
-    return hash_md5.hexdigest()
 
-
-def calculate_data_hash(data: bytes) -> str:
-    """Calculate MD5 hash of bytes data."""
-    return hashlib.md5(data).hexdigest()
-
-
-def get_processing_metadata(client: Minio, bucket: str, object_name: str) -> Optional[dict]:
-    """Retrieve processing metadata for an object."""
-    metadata_key = f"{object_name}.metadata.json"
+def _load_bucket_registry(client: Minio) -> set[str]:
+    """List the existing buckets once, or start empty if listing is not allowed."""
     try:
-        response = client.get_object(BUCKET_METADATA, metadata_key)
-        data = response.read()
-        response.close()
-        response.release_conn()
-        return json.loads(data.decode("utf-8"))
-    except Exception:
-        return None
-
-
-def save_processing_metadata(
-    client: Minio,
-    object_name: str,
-    source_hash: str,
-    row_count: int,
-    status: str = "processed",
-    extra: Optional[dict] = None
-) -> None:
-    """Save processing metadata for tracking."""
-    ensure_bucket_exists(client, BUCKET_METADATA)
-
-    metadata = {
-        "object_name": object_name,
-        "source_hash": source_hash,
-        "row_count": row_count,
-        "status": status,
-        "processed_at": datetime.now().isoformat(),
-        "pipeline_version": "2.0"
-    }
-    if extra:
-        metadata.update(extra)
-
-    metadata_json = json.dumps(metadata, indent=2).encode("utf-8")
-    metadata_key = f"{object_name}.metadata.json"
-
-    client.put_object(
-        BUCKET_METADATA,
-        metadata_key,
-        BytesIO(metadata_json),
-        length=len(metadata_json),
-        content_type="application/json"
-    )
-    logger.info(f"Saved metadata for {object_name}")
-
-
-def move_to_quarantine(
-    client: Minio,
-    source_bucket: str,
-    object_name: str,
-    reason: str
-) -> str:
-    """Move invalid file to quarantine bucket with reason."""
-    ensure_bucket_exists(client, BUCKET_QUARANTINE)
-
-    # Get the object data
-    response = client.get_object(source_bucket, object_name)
-    data = response.read()
-    response.close()
-    response.release_conn()
-
-    # Create quarantine path with timestamp
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    quarantine_name = f"{timestamp}/{object_name}"
-
-    # Upload to quarantine
-    client.put_object(
-        BUCKET_QUARANTINE,
-        quarantine_name,
-        BytesIO(data),
-        length=len(data)
-    )
+        return {bucket.name for bucket in client.list_buckets()}
+    except S3Error as e:
+        logger.warning(f"Cannot list buckets ({e.code}), checking them one by one")
+        return set()
 
-    # Save quarantine metadata
-    quarantine_metadata = {
-        "original_bucket": source_bucket,
-        "original_name": object_name,
-        "reason": reason,
-        "quarantined_at": datetime.now().isoformat()
-    }
-    metadata_json = json.dumps(quarantine_metadata, indent=2).encode("utf-8")
-    client.put_object(
-        BUCKET_QUARANTINE,
-        f"{quarantine_name}.reason.json",
-        BytesIO(metadata_json),
-        length=len(metadata_json),
-        content_type="application/json"
-    )
 
-    logger.warning(f"Moved {object_name} to quarantine: {reason}")
-    return quarantine_name
+def ensure_bucket_exists(client: Minio, bucket_name: str) -> None:
+    """
+    Create bucket if it doesn't exist.
+
+    Known buckets are kept in a per-process registry, filled from
+    list_buckets on first use, so each bucket is checked at most once.
+    The lock only guards the registry: network calls are made without it,
+    so a slow response does not hold up threads needing other buckets.
+    """
+    global _known_buckets, _known_buckets_pid
+
+    pid = os.getpid()
+    with _buckets_lock:
+        loaded = _known_buckets is not None and _known_buckets_pid == pid
+        if loaded and bucket_name in _known_buckets:
+            return
+
+    if not loaded:
+        listed = _load_bucket_registry(client)
+        with _buckets_lock:
+            if _known_buckets is None or _known_buckets_pid != pid:
+                _known_buckets = listed
+                _known_buckets_pid = pid
+            else:
+                # Loaded meanwhile by another thread
+                _known_buckets |= listed
+            if bucket_name in _known_buckets:
+                return
+
+    # Threads checking the same new bucket at once all tolerate its creation
+    if not client.bucket_exists(bucket_name):
+        try:
+            client.make_bucket(bucket_name)
+            logger.info(f"Created bucket: {bucket_name}")
+        except S3Error as e:
+            # Created meanwhile by another process or thread
+            if e.code not in ("BucketAlreadyOwnedByYou", "BucketAlreadyExists"):
+                raise
+
+    with _buckets_lock:
+        # Unless the registry was reset meanwhile
+        if _known_buckets is not None and _known_buckets_pid == pid:
+            _known_buckets.add(bucket_name)
+
+
+def forget_bucket(bucket_name: str) -> None:
+    """Remove a bucket from the registry, e.g. after it was deleted."""
+    with _buckets_lock:
+        if _known_buckets is not None:
+            _known_buckets.discard(bucket_name)
+
+
+def reset_bucket_registry() -> None:
+    """Drop the bucket registry; the next ensure_bucket_exists() lists buckets again."""
+    global _known_buckets, _known_buckets_pid
+
+    with _buckets_lock:
+        _known_buckets = None
+        _known_buckets_pid = None
 
 
 def configure_prefect() -> None:
@@ -0,0 +1,284 @@
+"""
+Exact duplicate detection of integer keys.
+
+Keys are fed in stream order, batch by batch; a key is a duplicate when an
+equal key came earlier (Series.duplicated with keep="first").
+
+While the keys are dense, the detector keeps one bit per value of the key
+range, plus the positions of the duplicates found. When the range becomes
+sparse (many more values than keys) or the bitmap would exceed the memory
+budget, the bitmap is dropped for sorted runs of (key, position) pairs,
+spilled to disk past the budget and merged one key range at a time.
+"""
+import math
+import os
+import shutil
+import tempfile
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+# Smallest bitmap worth allocating (128 KiB), whatever the key count
+MIN_BITMAP_BITS = 1 << 20
+
+# A bitmap stops paying off past this many bits of range per key seen
+DENSE_BITS_PER_KEY = 16
+
+MIN_BUDGET_BYTES = 1024 * 1024
+
+# Budget of duplicated_keys, for a column already held in memory
+DEFAULT_BUDGET_BYTES = 256 * 1024 * 1024
+
+# Position of the keys carried over from the bitmap: earlier than any real one
+_CARRIED = -1
+
+
+class _SortedRuns:
+    """Sorted runs of (key, position) pairs, spilled to disk past the budget."""
+
+    def __init__(self, budget_bytes: int):
+        self.budget_bytes = budget_bytes
+        self._keys: list[np.ndarray] = []
+        self._positions: list[np.ndarray] = []
+        self._buffered_bytes = 0
+        self._runs: list[tuple[str, str]] = []
+        self._tmp_dir: Optional[str] = None
+
+    def add(self, keys: np.ndarray, positions: np.ndarray) -> None:
+        self._keys.append(keys)
+        self._positions.append(positions)
+        self._buffered_bytes += keys.nbytes + positions.nbytes
+        if self._buffered_bytes > self.budget_bytes:
+            self._spill()
+
+    def _sorted_buffer(self) -> tuple[np.ndarray, np.ndarray]:
+        if self._keys:
+            keys = np.concatenate(self._keys)
+            positions = np.concatenate(self._positions)
+        else:
+            keys = np.empty(0, dtype=np.int64)
+            positions = np.empty(0, dtype=np.int64)
+        self._keys, self._positions, self._buffered_bytes = [], [], 0
+        order = np.lexsort((positions, keys))
+        return keys[order], positions[order]
+
+    def _spill(self) -> None:
+        if self._tmp_dir is None:
+            self._tmp_dir = tempfile.mkdtemp(prefix="duplicate-keys-")
+        keys, positions = self._sorted_buffer()
+        base = os.path.join(self._tmp_dir, f"run-{len(self._runs):05d}")
+        np.save(base + "-keys.npy", keys)
+        np.save(base + "-positions.npy", positions)
+        self._runs.append((base + "-keys.npy", base + "-positions.npy"))
+
+    @staticmethod
+    def _duplicates_of_range(keys: np.ndarray, positions: np.ndarray) -> np.ndarray:
+        """Positions of the duplicates in pairs sorted by (key, position)."""
+        repeated = np.zeros(len(keys), dtype=bool)
+        repeated[1:] = keys[1:] == keys[:-1]
+        return positions[repeated]
+
+    def duplicate_positions(self) -> np.ndarray:
+        """Positions of all the duplicates, unsorted."""
+        last = self._sorted_buffer()
+        if not self._runs:
+            return self._duplicates_of_range(*last)
+
+        runs = [
+            (np.load(keys_path, mmap_mode="r"), np.load(positions_path, mmap_mode="r"))
+            for keys_path, positions_path in self._runs
+        ] + [last]
+        total = sum(len(keys) for keys, _ in runs)
+        # A range is concatenated then sorted: twice its 16 bytes per pair
+        n_ranges = max(1, math.ceil(2 * total * 16 / self.budget_bytes))
+
+        # Range bounds from a sample of every run; all runs are cut at the
+        # same keys, so equal keys always land in the same range
+        sample = np.sort(np.concatenate([keys[::max(1, len(keys) // 1024)] for keys, _ in runs if len(keys)]))
+        bounds = np.linspace(0, len(sample) - 1, n_ranges + 1)[1:-1].astype(np.int64)
+        splitters = np.unique(sample[bounds])
+        cuts = [
+            np.concatenate(([0], np.searchsorted(keys, splitters, side="left"), [len(keys)]))
+            for keys, _ in runs
+        ]
+
+        found = []
+        for i in range(len(splitters) + 1):
+            keys = np.concatenate([run_keys[cut[i]:cut[i + 1]] for (run_keys, _), cut in zip(runs, cuts)])
+            positions = np.concatenate([run_pos[cut[i]:cut[i + 1]] for (_, run_pos), cut in zip(runs, cuts)])
+            order = np.lexsort((positions, keys))
+            found.append(self._duplicates_of_range(keys[order], positions[order]))
+        return np.concatenate(found)
+
+    def close(self) -> None:
+        if self._tmp_dir is not None:
+            shutil.rmtree(self._tmp_dir, ignore_errors=True)
+            self._tmp_dir = None
+            self._runs = []
+
+
+class DuplicateKeyDetector:
+    """
+    Streaming exact duplicate detector of int64 keys.
+
+    Args:
+        budget_bytes: Memory the bitmap or the in-memory runs may use.
+    """
+
+    def __init__(self, budget_bytes: int):
+        self.budget_bytes = max(budget_bytes, MIN_BUDGET_BYTES)
+        self.key_count = 0
+        self._base: Optional[int] = None
+        self._low = self._high = 0
+        self._bits = np.zeros(0, dtype=np.uint8)
+        self._positions: list[np.ndarray] = []
+        self._runs: Optional[_SortedRuns] = None
+        self._result: Optional[np.ndarray] = None
+
+    @property
+    def mode(self) -> str:
+        """"bitmap" while keys are dense, "runs" once they are not."""
+        return "bitmap" if self._runs is None else "runs"
+
+    def add(self, keys: np.ndarray) -> None:
+        """Add the next batch of keys, in stream order."""
+        keys = np.asarray(keys, dtype=np.int64)
+        if len(keys) == 0:
+            return
+        positions = np.arange(self.key_count, self.key_count + len(keys), dtype=np.int64)
+        self.key_count += len(keys)
+        self._result = None
+
+        if self._runs is None and not self._fit_bitmap(int(keys.min()), int(keys.max())):
+            self._to_runs()
+        if self._runs is not None:
+            self._runs.add(keys, positions)
+            return
+
+        offsets = keys - self._base
+        seen = ((self._bits[offsets >> 3] >> (offsets & 7).astype(np.uint8)) & 1).astype(bool)
+        unique, first = np.unique(offsets, return_index=True)
+        repeated = seen.copy()
+        repeated_in_batch = np.ones(len(keys), dtype=bool)
+        repeated_in_batch[first] = False
+        repeated |= repeated_in_batch
+        if repeated.any():
+            self._positions.append(positions[repeated])
+
+        # New keys are distinct bits: summing them per byte is OR-ing them
+        new = unique[~seen[first]]
+        if len(new):
+            low, high = new[0] >> 3, new[-1] >> 3
+            added = np.bincount((new >> 3) - low, weights=np.left_shift(1, new & 7), minlength=high - low + 1)
+            self._bits[low:high + 1] |= added.astype(np.uint8)
+
+    @property
+    def _end(self) -> int:
+        return self._base + len(self._bits) * 8
+
+    def _fit_bitmap(self, low: int, high: int) -> bool:
+        """Grow the bitmap to cover [low, high]; False if it would be too large or sparse."""
+        if self._base is not None:
+            low, high = min(self._low, low), max(self._high, high)
+        span = high + 1 - low
+        if span > max(MIN_BITMAP_BITS, DENSE_BITS_PER_KEY * self.key_count) or span > self.budget_bytes * 8:
+            return False
+        self._low, self._high = low, high
+        if self._base is not None and self._base <= low and high < self._end:
+            return True
+
+        # Headroom on the side that grew, so a feed of increasing (or
+        # decreasing) ids does not reallocate on every batch
+        span_bytes = -(-span // 8)
+        pad = max(0, min(span_bytes, self.budget_bytes - span_bytes) // 2)
+        if self._base is None:
+            base = low
+        elif low < self._base:
+            # Keep the bits already set aligned on whole bytes
+            base = self._base - (-(-(self._base - low) // 8) + pad) * 8
+            if base < np.iinfo(np.int64).min:
+                base = self._base - -(-(self._base - low) // 8) * 8
+                if base < np.iinfo(np.int64).min:
+                    return False
+        else:
+            base = self._base
+        n_bytes = -(-(high + 1 - base) // 8)
+        if self._base is None or high >= self._end:
+            n_bytes += pad
+        if self._base is not None:
+            n_bytes = max(n_bytes, (self._base - base) // 8 + len(self._bits))
+
+        bits = np.zeros(n_bytes, dtype=np.uint8)
+        if self._base is not None:
+            shift = (self._base - base) // 8
+            bits[shift:shift + len(self._bits)] = self._bits
+        self._base, self._bits = base, bits
+        return True
+
+    def _to_runs(self) -> None:
+        """Replace the bitmap by sorted runs, carrying the keys already seen."""
+        self._runs = _SortedRuns(self.budget_bytes)
+        if self._base is not None:
+            offsets = np.flatnonzero(np.unpackbits(self._bits, bitorder="little"))
+            self._runs.add(offsets.astype(np.int64) + self._base, np.full(len(offsets), _CARRIED, dtype=np.int64))
+        self._bits = np.zeros(0, dtype=np.uint8)
+        self._base = None
+
+    def duplicate_positions(self) -> np.ndarray:
+        """Sorted stream positions of the keys equal to an earlier key."""
+        if self._result is None:
+            found = list(self._positions)
+            if self._runs is not None:
+                runs_found = self._runs.duplicate_positions()
+                found.append(runs_found[runs_found != _CARRIED])
+            self._result = np.sort(np.concatenate(found)) if found else np.empty(0, dtype=np.int64)
+        return self._result
+
+    def duplicate_count(self) -> int:
+        """Number of keys equal to an earlier key."""
+        return len(self.duplicate_positions())
+
+    def close(self) -> None:
+        """Release the temporary files of the runs."""
+        if self._runs is not None:
+            self._runs.close()
+
+    def __enter__(self) -> "DuplicateKeyDetector":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def duplicated_keys(values: pd.Series, budget_bytes: int = DEFAULT_BUDGET_BYTES) -> np.ndarray:
+    """
+    Boolean mask of the duplicate values of a key column (keep="first").
+
+    Integer keys go through DuplicateKeyDetector; any other column falls
+    back to Series.duplicated. Nulls are equal to each other, as in pandas.
+
+    Args:
+        values: Key column.
+        budget_bytes: Memory budget of the detector.
+
+    Returns:
+        Array with True at the positions of the duplicates.
+    """
+    nulls = values.isnull().to_numpy()
+    keys = values[~nulls]
+    if not pd.api.types.is_numeric_dtype(keys) or pd.api.types.is_bool_dtype(keys):
+        return values.duplicated(keep="first").to_numpy()
+    numeric = keys.to_numpy()
+    if numeric.dtype.kind == "f" and not (np.all(numeric == np.floor(numeric)) and np.all(np.abs(numeric) < 2 ** 63)):
+        return values.duplicated(keep="first").to_numpy()
+    if numeric.dtype.kind == "u" and len(numeric) and numeric.max() >= 2 ** 63:
+        return values.duplicated(keep="first").to_numpy()
+
+    mask = np.zeros(len(values), dtype=bool)
+    with DuplicateKeyDetector(budget_bytes) as detector:
+        detector.add(numeric.astype(np.int64))
+        mask[np.flatnonzero(~nulls)[detector.duplicate_positions()]] = True
+    null_positions = np.flatnonzero(nulls)
+    mask[null_positions[1:]] = True
+    return mask
@@ -2,18 +2,22 @@ from io import BytesIO
 from datetime import datetime
 
 import pandas as pd
+import pyarrow as pa
 from prefect import flow, task
 from prefect.logging import get_run_logger
 
 from config import (
     BUCKET_SILVER,
     BUCKET_GOLD,
-    get_minio_client,
-    ensure_bucket_exists,
-    calculate_data_hash,
+)
+from catalog import (
+    compact_layer_catalog,
+    get_layer_metadata,
     get_processing_metadata,
     save_processing_metadata,
 )
+from hashing import calculate_data_hash
+from storage import get_storage
 
 
 @task(name="Check Gold Freshness", retries=1)
@@ -28,7 +32,7 @@ def check_gold_freshness(force: bool = False) -> dict:
         Freshness check result with should_process flag and source hashes.
     """
     prefect_logger = get_run_logger()
-    client = get_minio_client()
+    storage = get_storage()
 
     result = {
         "should_process": True,
@@ -41,9 +45,10 @@ def check_gold_freshness(force: bool = False) -> dict:
         prefect_logger.info("Gold refresh: Force refresh enabled")
         return result
 
-    # Get silver metadata for both files
-    clients_silver_meta = get_processing_metadata(client, BUCKET_SILVER, "clients.parquet")
-    achats_silver_meta = get_processing_metadata(client, BUCKET_SILVER, "achats.parquet")
+    # Get silver metadata for both files in one catalog read
+    silver_meta = get_layer_metadata(storage, BUCKET_SILVER, ["clients.parquet", "achats.parquet"])
+    clients_silver_meta = silver_meta["clients.parquet"]
+    achats_silver_meta = silver_meta["achats.parquet"]
 
     if not clients_silver_meta or not achats_silver_meta:
         result["reason"] = "missing_silver_metadata"
@@ -51,7 +56,7 @@ def check_gold_freshness(force: bool = False) -> dict:
         return result
 
     # Get gold metadata (using dim_clients as reference)
-    gold_meta = get_processing_metadata(client, BUCKET_GOLD, "dim_clients.parquet")
+    gold_meta = get_processing_metadata(storage, BUCKET_GOLD, "dim_clients.parquet")
 
     if not gold_meta:
         result["reason"] = "no_gold_data"
@@ -92,15 +97,13 @@ def read_silver_data(object_name: str) -> tuple[pd.DataFrame, str]:
         Tuple of (DataFrame, data_hash).
     """
     prefect_logger = get_run_logger()
-    client = get_minio_client()
+    storage = get_storage()
 
-    response = client.get_object(BUCKET_SILVER, object_name)
-    data = response.read()
-    response.close()
-    response.release_conn()
+    # Memory-mapped with the local backend: hashed and decoded without a copy
+    data = storage.get_buffer(BUCKET_SILVER, object_name)
 
     data_hash = calculate_data_hash(data)
-    df = pd.read_parquet(BytesIO(data))
+    df = pd.read_parquet(pa.BufferReader(data))
 
     prefect_logger.info(f"Read {len(df)} rows from {BUCKET_SILVER}/{object_name}")
     return df, data_hash
@@ -432,17 +435,17 @@ def save_to_gold(
         Object name in the gold bucket.
     """
     prefect_logger = get_run_logger()
-    client = get_minio_client()
+    storage = get_storage()
 
-    ensure_bucket_exists(client, BUCKET_GOLD)
+    storage.ensure_bucket(BUCKET_GOLD)
 
     # Convert to Parquet
     buffer = BytesIO()
     df.to_parquet(buffer, index=False, engine="pyarrow")
     buffer.seek(0)
 
-    # Upload to MinIO
-    client.put_object(
+    # Upload to storage
+    storage.put_stream(
         BUCKET_GOLD,
         object_name,
         buffer,
@@ -453,7 +456,7 @@ def save_to_gold(
     # Save processing metadata
     table_type = "dimension" if is_dimension else "fact" if "fact_" in object_name else "kpi"
     save_processing_metadata(
-        client=client,
+        storage=storage,
         object_name=object_name,
         source_hash=calculate_data_hash(buffer.getvalue()),
         row_count=len(df),
@@ -563,6 +566,8 @@ def gold_aggregation_flow(force: bool = False) -> dict:
             {"layer": "kpis", "count": 6}
         ]
 
+        compact_layer_catalog(get_storage(), BUCKET_GOLD)
+
     except Exception as e:
         prefect_logger.error(f"Gold aggregation failed: {e}")
         results["errors"].append(str(e))
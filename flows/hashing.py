@@ -0,0 +1,295 @@
+"""
+File and data hashing.
+
+New hashes use HASH_ALGORITHM. Metadata records store the algorithm in
+`hash_algorithm`; records written before it was tracked used MD5, so a
+hash is only ever compared with one computed by the same algorithm.
+
+Files are hashed through a memory map fed to the hasher in HASH_CHUNK_SIZE
+slices, which avoids a copy per read. hashlib releases the GIL on large
+updates, so several files hash in parallel on a thread pool.
+
+Digests of local files are remembered in a small index (HASH_CACHE_PATH)
+keyed by path, size, mtime_ns and inode. A file whose stat still matches
+is not read again.
+"""
+import hashlib
+import json
+import mmap
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Optional
+
+from config import HASH_ALGORITHM, HASH_CACHE_PATH, HASH_CHUNK_SIZE, HASH_WORKERS, logger
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+LEGACY_HASH_ALGORITHM = "md5"
+
+_XXHASH_ALGORITHMS = ("xxh3_64", "xxh3_128")
+
+# A file modified this close to the moment it was hashed may change again
+# within the same mtime tick, so its digest is not cached
+RACY_WINDOW_NS = 2_000_000_000
+
+
+def available_algorithms() -> list[str]:
+    """List the supported hash algorithms installed here."""
+    algorithms = ["md5", "sha1", "sha256", "blake2b", "blake2s"]
+    if xxhash is not None:
+        algorithms.extend(_XXHASH_ALGORITHMS)
+    return algorithms
+
+
+def new_hasher(algorithm: Optional[str] = None) -> Any:
+    """
+    Create a hash object with the hashlib update/hexdigest interface.
+
+    Args:
+        algorithm: Algorithm name (default: HASH_ALGORITHM).
+
+    Returns:
+        New hash object.
+    """
+    algorithm = algorithm or HASH_ALGORITHM
+    if algorithm in _XXHASH_ALGORITHMS:
+        if xxhash is None:
+            raise ValueError(f"Hash algorithm {algorithm} requires the xxhash package")
+        return getattr(xxhash, algorithm)()
+    if algorithm not in available_algorithms():
+        raise ValueError(f"Unsupported hash algorithm: {algorithm}")
+    return hashlib.new(algorithm)
+
+
+def record_hash_algorithm(metadata: dict) -> str:
+    """Algorithm of the hashes of a metadata record."""
+    return metadata.get("hash_algorithm") or LEGACY_HASH_ALGORITHM
+
+
+def calculate_file_hash(file_path: str, algorithm: Optional[str] = None) -> str:
+    """Calculate the hash of a file for idempotency checks."""
+    hasher = new_hasher(algorithm)
+
+    with open(file_path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return hasher.hexdigest()
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            # Not mappable (special file system): large buffered reads instead
+            buffer = bytearray(HASH_CHUNK_SIZE)
+            view = memoryview(buffer)
+            while True:
+                n = f.readinto(buffer)
+                if not n:
+                    break
+                hasher.update(view[:n])
+            return hasher.hexdigest()
+
+    with mapped:
+        if hasattr(mapped, "madvise"):
+            mapped.madvise(mmap.MADV_SEQUENTIAL)
+        view = memoryview(mapped)
+        try:
+            for offset in range(0, len(mapped), HASH_CHUNK_SIZE):
+                hasher.update(view[offset:offset + HASH_CHUNK_SIZE])
+        finally:
+            view.release()
+
+    return hasher.hexdigest()
+
+
+def calculate_data_hash(data: bytes, algorithm: Optional[str] = None) -> str:
+    """Calculate the hash of bytes data."""
+    hasher = new_hasher(algorithm)
+    hasher.update(data)
+    return hasher.hexdigest()
+
+
+class FileHashCache:
+    """Index of file digests, valid while the size, mtime and inode are unchanged."""
+
+    def __init__(self, index_path: str):
+        self.index_path = index_path
+        self._entries: dict[str, dict] = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                self._entries = json.load(f)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable hash cache {self.index_path}: {e}")
+
+    @staticmethod
+    def signature(st: os.stat_result) -> dict:
+        """Stat fields that must be unchanged for a cached digest to be valid."""
+        return {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "inode": st.st_ino}
+
+    def get(self, file_path: str, st: os.stat_result, algorithm: str) -> Optional[str]:
+        """Return the cached digest of a file, or None if it may have changed."""
+        with self._lock:
+            entry = self._entries.get(os.path.abspath(file_path))
+        if entry is None or entry["stat"] != self.signature(st):
+            return None
+        return entry["digests"].get(algorithm)
+
+    def put(self, file_path: str, st: os.stat_result, algorithm: str, digest: str) -> None:
+        """Remember the digest of a file hashed while it had the stat `st`."""
+        if time.time_ns() - st.st_mtime_ns < RACY_WINDOW_NS:
+            return
+        key = os.path.abspath(file_path)
+        signature = self.signature(st)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry["stat"] != signature:
+                entry = self._entries[key] = {"stat": signature, "digests": {}}
+            entry["digests"][algorithm] = digest
+            self._dirty = True
+
+    def save(self) -> None:
+        """Write the index atomically, dropping files that no longer exist."""
+        with self._lock:
+            if not self._dirty:
+                return
+            self._entries = {path: entry for path, entry in self._entries.items() if os.path.exists(path)}
+            data = json.dumps(self._entries)
+            self._dirty = False
+
+        directory = os.path.dirname(os.path.abspath(self.index_path))
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(tmp_path, self.index_path)
+        except OSError as e:
+            logger.warning(f"Failed to save hash cache {self.index_path}: {e}")
+
+
+_file_hash_cache: Optional[FileHashCache] = None
+_file_hash_cache_lock = threading.Lock()
+
+
+def get_file_hash_cache() -> Optional[FileHashCache]:
+    """Get the hash cache of this process, or None if HASH_CACHE_PATH is empty."""
+    global _file_hash_cache
+
+    if not HASH_CACHE_PATH:
+        return None
+    with _file_hash_cache_lock:
+        if _file_hash_cache is None:
+            _file_hash_cache = FileHashCache(HASH_CACHE_PATH)
+        return _file_hash_cache
+
+
+def get_cached_file_hash(file_path: str, algorithm: Optional[str] = None) -> Optional[str]:
+    """Return the digest of a file from the hash cache without reading it, or None."""
+    cache = get_file_hash_cache()
+    if cache is None:
+        return None
+    return cache.get(file_path, os.stat(file_path), algorithm or HASH_ALGORITHM)
+
+
+def remember_file_hash(file_path: str, st: os.stat_result, algorithm: str, digest: str) -> None:
+    """
+    Store a digest computed elsewhere (e.g. while streaming the file).
+
+    Args:
+        file_path: Path of the file.
+        st: Stat of the file taken before it was read.
+        algorithm: Algorithm of the digest.
+        digest: Digest of the file content.
+    """
+    cache = get_file_hash_cache()
+    if cache is None:
+        return
+    if FileHashCache.signature(os.stat(file_path)) == FileHashCache.signature(st):
+        cache.put(file_path, st, algorithm, digest)
+        cache.save()
+
+
+def _hash_with_cache(file_path: str, algorithm: str, cache: Optional[FileHashCache]) -> str:
+    """Hash a file, reading it only when its stat does not match the cache."""
+    if cache is None:
+        return calculate_file_hash(file_path, algorithm)
+
+    st = os.stat(file_path)
+    digest = cache.get(file_path, st, algorithm)
+    if digest is not None:
+        return digest
+
+    digest = calculate_file_hash(file_path, algorithm)
+    # Only cache the digest if the file did not change while being read
+    if FileHashCache.signature(os.stat(file_path)) == FileHashCache.signature(st):
+        cache.put(file_path, st, algorithm, digest)
+    return digest
+
+
+def calculate_file_hashes(
+    file_paths: list[str],
+    algorithm: Optional[str] = None,
+    max_workers: Optional[int] = None,
+    use_cache: bool = True
+) -> list[str]:
+    """
+    Hash several files concurrently.
+
+    Args:
+        file_paths: Paths of the files.
+        algorithm: Algorithm name (default: HASH_ALGORITHM).
+        max_workers: Number of threads (default: HASH_WORKERS).
+        use_cache: Reuse digests of unchanged files from the hash cache.
+
+    Returns:
+        Hashes in the order of file_paths.
+    """
+    algorithm = algorithm or HASH_ALGORITHM
+    max_workers = max_workers or HASH_WORKERS
+    cache = get_file_hash_cache() if use_cache else None
+
+    if max_workers <= 1 or len(file_paths) <= 1:
+        digests = [_hash_with_cache(path, algorithm, cache) for path in file_paths]
+    else:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(file_paths))) as pool:
+            digests = list(pool.map(lambda path: _hash_with_cache(path, algorithm, cache), file_paths))
+
+    if cache is not None:
+        cache.save()
+    return digests
+
+
+def file_matches_record(file_path: str, file_hash: str, algorithm: str, metadata: dict) -> bool:
+    """
+    Check whether a file has the source hash of a metadata record.
+
+    When the record was hashed with another algorithm, the file is hashed
+    again with that one rather than reported as changed.
+
+    Args:
+        file_path: Path of the file.
+        file_hash: Hash of the file with `algorithm`.
+        algorithm: Algorithm of file_hash.
+        metadata: Metadata record with a source_hash.
+
+    Returns:
+        True if the file content is the one recorded.
+    """
+    record_algorithm = record_hash_algorithm(metadata)
+    if record_algorithm != algorithm:
+        try:
+            file_hash = calculate_file_hashes([file_path], record_algorithm)[0]
+        except ValueError:
+            return False
+    return metadata.get("source_hash") == file_hash
@@ -1,20 +1,20 @@
-from io import BytesIO
 from datetime import datetime
 from typing import Optional
 
 import pandas as pd
+import pyarrow as pa
 from prefect import flow, task
 from prefect.logging import get_run_logger
 from pymongo import UpdateOne
 
 from config import (
     BUCKET_GOLD,
-    get_minio_client,
+    HASH_ALGORITHM,
     get_mongo_database,
-    get_processing_metadata,
-    save_processing_metadata,
-    calculate_data_hash,
 )
+from catalog import get_processing_metadata
+from hashing import calculate_data_hash
+from storage import get_storage
 
 
 # MongoDB collection names mapping
@@ -58,12 +58,12 @@ def list_gold_objects() -> list[str]:
         List of object names.
     """
     prefect_logger = get_run_logger()
-    client = get_minio_client()
+    storage = get_storage()
 
     objects = []
-    for obj in client.list_objects(BUCKET_GOLD):
-        if obj.object_name.endswith(".parquet"):
-            objects.append(obj.object_name)
+    for obj in storage.list_objects(BUCKET_GOLD):
+        if obj.key.endswith(".parquet"):
+            objects.append(obj.key)
 
     prefect_logger.info(f"Found {len(objects)} parquet files in gold bucket")
     return objects
@@ -82,7 +82,7 @@ def check_mongodb_freshness(gold_object: str, force: bool = False) -> dict:
         Freshness check result.
     """
     prefect_logger = get_run_logger()
-    minio_client = get_minio_client()
+    storage = get_storage()
     db = get_mongo_database()
 
     collection_name = GOLD_TO_MONGO_MAPPING.get(gold_object)
@@ -106,7 +106,7 @@ def check_mongodb_freshness(gold_object: str, force: bool = False) -> dict:
         return result
 
     # Get gold metadata
-    gold_metadata = get_processing_metadata(minio_client, BUCKET_GOLD, gold_object)
+    gold_metadata = get_processing_metadata(storage, BUCKET_GOLD, gold_object)
     if not gold_metadata:
         result["reason"] = "no_gold_metadata"
         prefect_logger.info(f"{gold_object}: No gold metadata, will load")
@@ -150,15 +150,12 @@ def read_gold_data(object_name: str) -> tuple[pd.DataFrame, str]:
         Tuple of (DataFrame, data_hash).
     """
     prefect_logger = get_run_logger()
-    client = get_minio_client()
+    storage = get_storage()
 
-    response = client.get_object(BUCKET_GOLD, object_name)
-    data = response.read()
-    response.close()
-    response.release_conn()
+    data = storage.get_buffer(BUCKET_GOLD, object_name)
 
     data_hash = calculate_data_hash(data)
-    df = pd.read_parquet(BytesIO(data))
+    df = pd.read_parquet(pa.BufferReader(data))
 
     prefect_logger.info(f"Read {len(df)} rows from {BUCKET_GOLD}/{object_name}")
     return df, data_hash
@@ -285,6 +282,7 @@ def save_sync_metadata(
         "collection_name": collection_name,
         "gold_object": gold_object,
         "source_hash": source_hash,
+        "hash_algorithm": HASH_ALGORITHM,
         "row_count": row_count,
         "last_sync": datetime.now(),
         "stats": stats,
@@ -312,11 +310,11 @@ def calculate_refresh_time(gold_object: str) -> Optional[dict]:
         Refresh time information or None.
     """
     prefect_logger = get_run_logger()
-    minio_client = get_minio_client()
+    storage = get_storage()
     db = get_mongo_database()
 
     # Get gold processing time
-    gold_metadata = get_processing_metadata(minio_client, BUCKET_GOLD, gold_object)
+    gold_metadata = get_processing_metadata(storage, BUCKET_GOLD, gold_object)
     if not gold_metadata:
         return None
 
@@ -0,0 +1,191 @@
+"""
+CSV parsing with the Arrow reader.
+
+Files are parsed by pyarrow.csv on several threads, block by block, with
+the column types of SCHEMAS instead of types guessed from the values.
+The other options mirror pd.read_csv (same null markers, no timestamp
+inference), so a file gives the same DataFrame either way.
+
+Rows the Arrow reader rejects but pandas accepts (e.g. a line with missing
+fields, which pandas fills with NaN) make read_csv_frame fall back to
+pd.read_csv; streaming callers catch pa.ArrowInvalid and do the same.
+
+Sources may be compressed (.csv.gz, .csv.bz2, .csv.zst): they are
+decompressed while they are parsed, never to disk. The codec is taken from
+the file name, also for content passed as bytes.
+"""
+from typing import Iterator, Optional, Union
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pv
+
+from config import CSV_BLOCK_SIZE, SCHEMAS
+
+# Arrow types of the SCHEMAS types; nullable, so missing values stay null
+ARROW_TYPES = {
+    "int64": pa.int64(),
+    "float64": pa.float64(),
+    "object": pa.string(),
+}
+
+# Values pd.read_csv reads as missing by default
+PANDAS_NA_VALUES = [
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+]
+
+# Compression of a source file by extension, as pyarrow codec names
+COMPRESSIONS = {".gz": "gzip", ".bz2": "bz2", ".zst": "zstd"}
+CSV_PATTERNS = ["*.csv"] + [f"*.csv{extension}" for extension in COMPRESSIONS]
+
+CsvSource = Union[str, bytes]
+
+
+def compression_of(name: str) -> Optional[str]:
+    """Codec of a file from its name, or None if it is not compressed."""
+    for extension, codec in COMPRESSIONS.items():
+        if name.endswith(extension):
+            return codec
+    return None
+
+
+def csv_base_name(name: str) -> str:
+    """Name of a CSV without its compression extension (clients.csv.gz -> clients.csv)."""
+    for extension in COMPRESSIONS:
+        if name.endswith(extension):
+            return name[:-len(extension)]
+    return name
+
+
+def is_csv_name(name: str) -> bool:
+    """Whether a name is that of a CSV, compressed or not."""
+    return csv_base_name(name).endswith(".csv")
+
+
+def open_csv_input(source: CsvSource, name: Optional[str] = None, length: Optional[int] = None) -> pa.NativeFile:
+    """
+    Open a CSV for reading, decompressing it on the fly.
+
+    Args:
+        source: Path of the file, or its content.
+        name: File name giving the compression (default: the path).
+        length: Only read the first `length` bytes of the file (default: all).
+
+    Returns:
+        Readable file object; also accepted by pd.read_csv.
+    """
+    compression = compression_of(name if name is not None else source if isinstance(source, str) else "")
+    if isinstance(source, bytes):
+        raw = pa.BufferReader(source)
+    elif length is not None:
+        # Bytes appended to the file after it was measured are left out
+        raw = pa.BufferReader(pa.memory_map(source).read_buffer(length))
+    else:
+        raw = pa.OSFile(source)
+    return pa.CompressedInputStream(raw, compression) if compression else raw
+
+
+def csv_column_types(entity_type: Optional[str]) -> dict[str, pa.DataType]:
+    """Arrow types of the columns of an entity, from SCHEMAS."""
+    types = SCHEMAS.get(entity_type, {}).get("types", {})
+    return {column: ARROW_TYPES[dtype] for column, dtype in types.items() if dtype in ARROW_TYPES}
+
+
+def csv_options(
+    entity_type: Optional[str],
+    block_size: Optional[int] = None
+) -> tuple[pv.ReadOptions, pv.ParseOptions, pv.ConvertOptions]:
+    """Arrow read, parse and convert options for a file of an entity."""
+    read_options = pv.ReadOptions(use_threads=True, block_size=block_size or CSV_BLOCK_SIZE)
+    convert_options = pv.ConvertOptions(
+        column_types=csv_column_types(entity_type),
+        null_values=PANDAS_NA_VALUES,
+        strings_can_be_null=True,
+        timestamp_parsers=[]
+    )
+    return read_options, pv.ParseOptions(), convert_options
+
+
+def read_csv_table(
+    source: CsvSource,
+    entity_type: Optional[str] = None,
+    block_size: Optional[int] = None,
+    name: Optional[str] = None
+) -> pa.Table:
+    """
+    Parse a whole CSV into an Arrow table on several threads.
+
+    Args:
+        source: Path of the file, or its content.
+        entity_type: Entity of the file, for the SCHEMAS column types.
+        block_size: Bytes parsed per block (default: CSV_BLOCK_SIZE).
+        name: File name giving the compression (default: the path).
+
+    Returns:
+        Arrow table.
+    """
+    read_options, parse_options, convert_options = csv_options(entity_type, block_size)
+    with open_csv_input(source, name) as f:
+        return pv.read_csv(
+            f, read_options=read_options, parse_options=parse_options, convert_options=convert_options
+        )
+
+
+def table_to_frame(table: pa.Table, arrow_backed: bool = False) -> pd.DataFrame:
+    """Convert a table to pandas: NumPy columns, or ArrowDtype columns without a copy."""
+    if arrow_backed:
+        return table.to_pandas(types_mapper=pd.ArrowDtype)
+    return table.to_pandas()
+
+
+def read_csv_frame(
+    source: CsvSource,
+    entity_type: Optional[str] = None,
+    block_size: Optional[int] = None,
+    arrow_backed: bool = False,
+    name: Optional[str] = None
+) -> pd.DataFrame:
+    """
+    Parse a whole CSV into a DataFrame, falling back to pd.read_csv for
+    rows the Arrow reader rejects.
+
+    Args:
+        source: Path of the file, or its content.
+        entity_type: Entity of the file, for the SCHEMAS column types.
+        block_size: Bytes parsed per block (default: CSV_BLOCK_SIZE).
+        arrow_backed: Return ArrowDtype columns instead of NumPy ones.
+        name: File name giving the compression (default: the path).
+
+    Returns:
+        DataFrame.
+    """
+    try:
+        return table_to_frame(read_csv_table(source, entity_type, block_size, name), arrow_backed)
+    except pa.ArrowInvalid:
+        with open_csv_input(source, name) as f:
+            df = pd.read_csv(f)
+        return df.convert_dtypes(dtype_backend="pyarrow") if arrow_backed else df
+
+
+def iter_csv_frames(
+    file_path: str,
+    entity_type: Optional[str] = None,
+    block_size: Optional[int] = None,
+    length: Optional[int] = None
+) -> Iterator[pd.DataFrame]:
+    """
+    Parse a CSV one block at a time, so memory stays bounded by the block size.
+
+    Only the first `length` bytes of the file are parsed, when given. Raises
+    pa.ArrowInvalid on a row the Arrow reader rejects, possibly after earlier
+    blocks were yielded.
+    """
+    read_options, parse_options, convert_options = csv_options(entity_type, block_size)
+    with open_csv_input(file_path, length=length) as f, pv.open_csv(
+        f, read_options=read_options, parse_options=parse_options, convert_options=convert_options
+    ) as reader:
+        for batch in reader:
+            if batch.num_rows:
+                yield batch.to_pandas()
+
@@ -2,20 +2,27 @@ from io import BytesIO
 from datetime import datetime
 
 import pandas as pd
+import pyarrow as pa
 from prefect import flow, task
 from prefect.logging import get_run_logger
 
 from config import (
     BUCKET_BRONZE,
     BUCKET_SILVER,
+    HASH_ALGORITHM,
     SCHEMAS,
     VALIDATION_RULES,
-    get_minio_client,
-    ensure_bucket_exists,
-    calculate_data_hash,
+)
+from catalog import (
+    compact_layer_catalog,
+    get_layer_metadata,
     get_processing_metadata,
     save_processing_metadata,
 )
+from duplicates import duplicated_keys
+from hashing import calculate_data_hash, record_hash_algorithm
+from parsing import COMPRESSIONS, csv_base_name, is_csv_name, read_csv_frame
+from storage import ObjectNotFoundError, get_storage
 
 
 @task(name="List Bronze Objects", retries=1)
@@ -27,17 +34,33 @@ def list_bronze_objects() -> list[str]:
         List of object names in the bronze bucket.
     """
     prefect_logger = get_run_logger()
-    client = get_minio_client()
+    storage = get_storage()
 
     objects = []
-    for obj in client.list_objects(BUCKET_BRONZE):
-        if obj.object_name.endswith(".csv"):
-            objects.append(obj.object_name)
+    for obj in storage.list_objects(BUCKET_BRONZE):
+        if is_csv_name(obj.key):
+            objects.append(obj.key)
 
     prefect_logger.info(f"Found {len(objects)} CSV files in bronze bucket")
     return objects
 
 
+def silver_object_name(bronze_object: str) -> str:
+    """Name of the silver Parquet of a bronze CSV (clients.csv.gz -> clients.parquet)."""
+    return csv_base_name(bronze_object).replace(".csv", ".parquet")
+
+
+def find_bronze_object(entity_type: str) -> str:
+    """
+    Name of the bronze object of an entity: <entity>.csv, or a compressed
+    <entity>.csv.gz/.bz2/.zst. When several exist, the last one ingested.
+    """
+    candidates = [f"{entity_type}.csv"] + [f"{entity_type}.csv{extension}" for extension in COMPRESSIONS]
+    records = get_layer_metadata(get_storage(), BUCKET_BRONZE, candidates)
+    ingested = [(record.get("processed_at", ""), name) for name, record in records.items() if record]
+    return max(ingested)[1] if ingested else candidates[0]
+
+
 @task(name="Check Silver Freshness", retries=1)
 def check_silver_freshness(bronze_object: str, force: bool = False) -> dict:
     """
@@ -51,9 +74,9 @@ def check_silver_freshness(bronze_object: str, force: bool = False) -> dict:
         Freshness check result with should_process flag.
     """
     prefect_logger = get_run_logger()
-    client = get_minio_client()
+    storage = get_storage()
 
-    silver_object = bronze_object.replace(".csv", ".parquet")
+    silver_object = silver_object_name(bronze_object)
 
     result = {
         "bronze_object": bronze_object,
@@ -68,10 +91,10 @@ def check_silver_freshness(bronze_object: str, force: bool = False) -> dict:
         return result
 
     # Get bronze metadata
-    bronze_metadata = get_processing_metadata(client, BUCKET_BRONZE, bronze_object)
+    bronze_metadata = get_processing_metadata(storage, BUCKET_BRONZE, bronze_object)
 
     # Get silver metadata
-    silver_metadata = get_processing_metadata(client, BUCKET_SILVER, silver_object)
+    silver_metadata = get_processing_metadata(storage, BUCKET_SILVER, silver_object)
 
     if not bronze_metadata:
         result["reason"] = "no_bronze_metadata"
@@ -101,29 +124,51 @@ def check_silver_freshness(bronze_object: str, force: bool = False) -> dict:
 
 
 @task(name="Read Bronze Data", retries=2)
-def read_bronze_data(object_name: str) -> tuple[pd.DataFrame, str]:
+def read_bronze_data(object_name: str) -> tuple[pd.DataFrame, str, str]:
     """
     Read CSV data from the bronze bucket.
 
+    The typed Parquet copy written at ingestion is read instead of the CSV
+    when the bronze record lists one for the current source hash. The
+    delta objects of lines appended to the source are read after the CSV.
+
     Args:
         object_name: Name of the object in the bronze bucket.
 
+    The data is hashed with the algorithm of the bronze record, so the hash
+    compares equal to its source_hash also for records hashed with MD5.
+
     Returns:
-        Tuple of (DataFrame, data_hash).
+        Tuple of (DataFrame, data_hash, algorithm of data_hash).
     """
     prefect_logger = get_run_logger()
-    client = get_minio_client()
-
-    response = client.get_object(BUCKET_BRONZE, object_name)
-    data = response.read()
-    response.close()
-    response.release_conn()
-
-    data_hash = calculate_data_hash(data)
-    df = pd.read_csv(BytesIO(data))
+    storage = get_storage()
+
+    metadata = get_processing_metadata(storage, BUCKET_BRONZE, object_name) or {}
+    hash_algorithm = record_hash_algorithm(metadata) if metadata else HASH_ALGORITHM
+    columnar = metadata.get("columnar_copy")
+    if columnar and columnar.get("source_hash") == metadata.get("source_hash"):
+        try:
+            buf = storage.get_buffer(BUCKET_BRONZE, columnar["key"])
+        except ObjectNotFoundError:
+            prefect_logger.warning(f"Parquet copy {columnar['key']} is missing, reading the CSV")
+        else:
+            df = pd.read_parquet(pa.BufferReader(buf))
+            prefect_logger.info(f"Read {len(df)} rows from {BUCKET_BRONZE}/{columnar['key']}")
+            # The hash of the CSV the copy was made from
+            return df, metadata["source_hash"], hash_algorithm
+
+    data = storage.get(BUCKET_BRONZE, object_name)
+    deltas = metadata.get("deltas", [])
+    if deltas:
+        # Lines appended since the object was ingested, under their own header
+        data = b"".join([data] + [storage.get(BUCKET_BRONZE, delta).split(b"\n", 1)[1] for delta in deltas])
+
+    data_hash = calculate_data_hash(data, hash_algorithm)
+    df = read_csv_frame(data, metadata.get("schema", {}).get("entity_type"), name=object_name)
 
     prefect_logger.info(f"Read {len(df)} rows from {BUCKET_BRONZE}/{object_name}")
-    return df, data_hash
+    return df, data_hash, hash_algorithm
 
 
 @task(name="Validate Schema")
@@ -192,7 +237,7 @@ def clean_clients(df: pd.DataFrame) -> tuple[pd.DataFrame, dict]:
 
     # Remove duplicates on id_client
     before = len(df)
-    df = df.drop_duplicates(subset=["id_client"], keep="first")
+    df = df[~duplicated_keys(df["id_client"])]
     quality_metrics["duplicates_removed"] = before - len(df)
 
     # Remove rows with null values in critical columns
@@ -254,7 +299,7 @@ def clean_achats(df: pd.DataFrame, valid_client_ids: set) -> tuple[pd.DataFrame,
 
     # Remove duplicates on id_achat
     before = len(df)
-    df = df.drop_duplicates(subset=["id_achat"], keep="first")
+    df = df[~duplicated_keys(df["id_achat"])]
     quality_metrics["duplicates_removed"] = before - len(df)
 
     # Remove rows with null values
@@ -319,7 +364,8 @@ def save_to_silver(
     df: pd.DataFrame,
     object_name: str,
     source_hash: str,
-    quality_metrics: dict
+    quality_metrics: dict,
+    hash_algorithm: str = HASH_ALGORITHM
 ) -> str:
     """
     Save DataFrame to the silver bucket as Parquet with metadata.
@@ -329,23 +375,24 @@ def save_to_silver(
         object_name: Name of the object.
         source_hash: Hash of the source data.
         quality_metrics: Quality metrics from cleaning.
+        hash_algorithm: Algorithm of source_hash.
 
     Returns:
         Object name in the silver bucket.
     """
     prefect_logger = get_run_logger()
-    client = get_minio_client()
+    storage = get_storage()
 
-    ensure_bucket_exists(client, BUCKET_SILVER)
+    storage.ensure_bucket(BUCKET_SILVER)
 
     # Convert to Parquet
     buffer = BytesIO()
     df.to_parquet(buffer, index=False, engine="pyarrow")
     buffer.seek(0)
 
-    # Upload to MinIO
-    parquet_name = object_name.replace(".csv", ".parquet")
-    client.put_object(
+    # Upload to storage
+    parquet_name = silver_object_name(object_name)
+    storage.put_stream(
         BUCKET_SILVER,
         parquet_name,
         buffer,
@@ -355,11 +402,12 @@ def save_to_silver(
 
     # Save processing metadata
     save_processing_metadata(
-        client=client,
+        storage=storage,
         object_name=parquet_name,
         source_hash=source_hash,
         row_count=len(df),
         status="transformed_to_silver",
+        hash_algorithm=hash_algorithm,
         extra={
             "quality_metrics": quality_metrics,
             "layer": "silver",
@@ -446,20 +494,24 @@ def silver_transformation_flow(force: bool = False) -> dict:
         "quality_report": None
     }
 
+    # Bronze objects, plain or compressed CSV
+    clients_object = find_bronze_object("clients")
+    achats_object = find_bronze_object("achats")
+
     # Check freshness for clients
-    clients_freshness = check_silver_freshness("clients.csv", force=force)
-    achats_freshness = check_silver_freshness("achats.csv", force=force)
+    clients_freshness = check_silver_freshness(clients_object, force=force)
+    achats_freshness = check_silver_freshness(achats_object, force=force)
 
     # If both are fresh, skip processing
     if not clients_freshness["should_process"] and not achats_freshness["should_process"]:
         prefect_logger.info("All silver data is up to date, nothing to process")
-        results["skipped"] = ["clients.csv", "achats.csv"]
+        results["skipped"] = [clients_object, achats_object]
         return results
 
     try:
         # Read bronze data
-        clients_bronze, clients_hash = read_bronze_data("clients.csv")
-        achats_bronze, achats_hash = read_bronze_data("achats.csv")
+        clients_bronze, clients_hash, clients_hash_algorithm = read_bronze_data(clients_object)
+        achats_bronze, achats_hash, achats_hash_algorithm = read_bronze_data(achats_object)
 
         # Validate schemas
         clients_schema_result = validate_schema(clients_bronze, "clients")
@@ -482,10 +534,10 @@ def silver_transformation_flow(force: bool = False) -> dict:
 
         # Save to silver
         silver_clients = save_to_silver(
-            clients_clean, "clients.csv", clients_hash, clients_metrics
+            clients_clean, clients_object, clients_hash, clients_metrics, clients_hash_algorithm
         )
         silver_achats = save_to_silver(
-            achats_clean, "achats.csv", achats_hash, achats_metrics
+            achats_clean, achats_object, achats_hash, achats_metrics, achats_hash_algorithm
         )
 
         # Generate quality report
@@ -497,6 +549,8 @@ def silver_transformation_flow(force: bool = False) -> dict:
         ]
         results["quality_report"] = quality_report
 
+        compact_layer_catalog(get_storage(), BUCKET_SILVER)
+
     except Exception as e:
         prefect_logger.error(f"Silver transformation failed: {e}")
         results["errors"].append(str(e))
@@ -0,0 +1,914 @@
+"""
+Object storage used by the pipeline layers.
+
+The flows read and write buckets through a StorageBackend:
+- MinioStorage: the MinIO/S3 object store (default)
+- LocalStorage: one directory per bucket under LOCAL_STORAGE_ROOT, to run
+  the whole chain on one machine without a MinIO container. Reads of whole
+  objects can be memory-mapped, so Parquet is decoded without a copy.
+
+STORAGE_BACKEND selects the backend returned by get_storage().
+"""
+import io
+import json
+import mimetypes
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from io import BytesIO
+from typing import Any, BinaryIO, Iterator, Optional
+
+import pyarrow as pa
+import urllib3
+from minio import Minio
+from minio.commonconfig import CopySource
+from minio.datatypes import Part
+from minio.deleteobjects import DeleteObject
+from minio.error import InvalidResponseError, S3Error, ServerError
+from minio.helpers import MAX_MULTIPART_COUNT, MAX_PART_SIZE, MIN_PART_SIZE
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from config import (
+    BUCKET_QUARANTINE,
+    LOCAL_STORAGE_ROOT,
+    STORAGE_BACKEND,
+    ensure_bucket_exists,
+    get_minio_client,
+    logger,
+)
+
+STREAM_CHUNK_SIZE = 1024 * 1024
+
+# First delay before retrying a failed part of a multipart upload, doubled
+# on each attempt
+UPLOAD_RETRY_BACKOFF = 0.5
+
+# Permissions of the objects written by LocalStorage
+OBJECT_FILE_MODE = 0o644
+
+
+class StorageError(Exception):
+    """Error raised by a storage backend."""
+
+
+class ObjectNotFoundError(StorageError):
+    """The requested object or its bucket does not exist."""
+
+
+class PreconditionFailedError(StorageError):
+    """A conditional write found the object changed."""
+
+
+@dataclass
+class ObjectInfo:
+    """Description of a stored object."""
+
+    bucket: str
+    key: str
+    size: int = 0
+    etag: str = ""
+    last_modified: Optional[datetime] = None
+    content_type: str = "application/octet-stream"
+    is_dir: bool = False
+
+
+class StorageBackend(ABC):
+    """Operations the pipeline needs from an object store."""
+
+    name = "abstract"
+
+    @abstractmethod
+    def ensure_bucket(self, bucket: str) -> None:
+        """Create a bucket if it does not exist."""
+
+    @abstractmethod
+    def get(self, bucket: str, key: str) -> bytes:
+        """Read a whole object."""
+
+    @abstractmethod
+    def get_with_etag(
+        self,
+        bucket: str,
+        key: str,
+        if_none_match: Optional[str] = None
+    ) -> tuple[Optional[bytes], str]:
+        """
+        Read an object unless its ETag is `if_none_match`.
+
+        Returns:
+            Tuple of (data, etag); data is None when the object is unchanged.
+        """
+
+    @abstractmethod
+    def get_range(self, bucket: str, key: str, offset: int, length: int) -> bytes:
+        """Read `length` bytes of an object starting at `offset`."""
+
+    def get_buffer(self, bucket: str, key: str) -> pa.Buffer:
+        """Read a whole object as an Arrow buffer, without a copy when possible."""
+        return pa.py_buffer(self.get(bucket, key))
+
+    @abstractmethod
+    def stream(self, bucket: str, key: str, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+        """Iterate over the content of an object in chunks."""
+
+    def put(
+        self,
+        bucket: str,
+        key: str,
+        data: bytes,
+        content_type: str = "application/octet-stream"
+    ) -> str:
+        """Write an object and return its ETag."""
+        return self.put_stream(bucket, key, BytesIO(data), len(data), content_type)
+
+    @abstractmethod
+    def put_if_match(
+        self,
+        bucket: str,
+        key: str,
+        data: bytes,
+        etag: Optional[str],
+        content_type: str = "application/octet-stream"
+    ) -> str:
+        """
+        Write an object only if its ETag is still `etag`.
+
+        Args:
+            etag: ETag the object must have, or None if it must not exist.
+
+        Returns:
+            ETag of the new object.
+
+        Raises:
+            PreconditionFailedError: The object was replaced (or created)
+                by another writer.
+        """
+
+    @abstractmethod
+    def put_stream(
+        self,
+        bucket: str,
+        key: str,
+        stream: BinaryIO,
+        length: int,
+        content_type: str = "application/octet-stream"
+    ) -> str:
+        """Write an object from a readable stream of `length` bytes and return its ETag."""
+
+    def put_file(
+        self,
+        bucket: str,
+        key: str,
+        file_path: str,
+        content_type: str = "application/octet-stream"
+    ) -> str:
+        """Upload a local file and return its ETag."""
+        with open(file_path, "rb") as f:
+            return self.put_stream(bucket, key, f, os.fstat(f.fileno()).st_size, content_type)
+
+    def put_file_parts(
+        self,
+        bucket: str,
+        key: str,
+        file_path: str,
+        part_size: int,
+        max_workers: int = 1,
+        retries: int = 0,
+        hasher: Any = None,
+        content_type: str = "application/octet-stream",
+        length: Optional[int] = None
+    ) -> str:
+        """
+        Upload a local file in parts of part_size bytes, max_workers at a time.
+
+        Each part is retried up to `retries` times. When given, `hasher` is
+        updated with the parts in order, so the read that uploads the file
+        also hashes it. Only the first `length` bytes are uploaded (default:
+        the whole file), so a file appended to meanwhile is uploaded as it
+        was measured. This default streams the file in a single upload.
+
+        Returns:
+            ETag of the object.
+        """
+        with open(file_path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size if length is None else length
+            reader = _HashingReader(f, hasher) if hasher is not None else f
+            return self.put_stream(bucket, key, reader, size, content_type)
+
+    @abstractmethod
+    def list_objects(self, bucket: str, prefix: str = "", recursive: bool = False) -> Iterator[ObjectInfo]:
+        """List objects, sorted by key. Without recursion, sub-prefixes are listed as directories."""
+
+    @abstractmethod
+    def stat(self, bucket: str, key: str) -> Optional[ObjectInfo]:
+        """Describe an object, or None if it does not exist."""
+
+    @abstractmethod
+    def copy(self, source_bucket: str, source_key: str, target_bucket: str, target_key: str) -> str:
+        """
+        Copy an object without reading it into memory.
+
+        Returns:
+            How the copy was made.
+        """
+
+    @abstractmethod
+    def delete(self, bucket: str, keys: list[str]) -> None:
+        """Delete objects; missing ones are ignored."""
+
+
+def _is_not_found(error: S3Error) -> bool:
+    return error.code in ("NoSuchKey", "NoSuchBucket", "NoSuchObject")
+
+
+def _is_not_modified(error: Exception) -> bool:
+    """Whether a failed GET is a 304 answer to a conditional request."""
+    if isinstance(error, ServerError):
+        return error.status_code == 304
+    if isinstance(error, InvalidResponseError):
+        return getattr(error, "_code", None) == 304
+    return False
+
+
+class MinioStorage(StorageBackend):
+    """Storage on the MinIO server of the configuration."""
+
+    name = "minio"
+
+    @property
+    def client(self) -> Minio:
+        # Resolved on each use: get_minio_client() handles forks
+        return get_minio_client()
+
+    def ensure_bucket(self, bucket: str) -> None:
+        ensure_bucket_exists(self.client, bucket)
+
+    def _get_object(self, bucket: str, key: str, **kwargs):
+        try:
+            return self.client.get_object(bucket, key, **kwargs)
+        except S3Error as e:
+            if _is_not_found(e):
+                raise ObjectNotFoundError(f"{bucket}/{key}") from e
+            raise
+
+    def get(self, bucket: str, key: str) -> bytes:
+        response = self._get_object(bucket, key)
+        try:
+            return response.read()
+        finally:
+            response.close()
+            response.release_conn()
+
+    def get_with_etag(
+        self,
+        bucket: str,
+        key: str,
+        if_none_match: Optional[str] = None
+    ) -> tuple[Optional[bytes], str]:
+        headers = {"If-None-Match": f'"{if_none_match}"'} if if_none_match else None
+        try:
+            response = self._get_object(bucket, key, request_headers=headers)
+        except (ServerError, InvalidResponseError) as e:
+            if if_none_match and _is_not_modified(e):
+                return None, if_none_match
+            raise
+        try:
+            return response.read(), response.headers.get("ETag", "").strip('"')
+        finally:
+            response.close()
+            response.release_conn()
+
+    def get_range(self, bucket: str, key: str, offset: int, length: int) -> bytes:
+        if length <= 0:
+            return b""
+        response = self._get_object(bucket, key, offset=offset, length=length)
+        try:
+            return response.read()
+        finally:
+            response.close()
+            response.release_conn()
+
+    def stream(self, bucket: str, key: str, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+        response = self._get_object(bucket, key)
+        try:
+            yield from response.stream(chunk_size)
+        finally:
+            response.close()
+            response.release_conn()
+
+    def put_stream(
+        self,
+        bucket: str,
+        key: str,
+        stream: BinaryIO,
+        length: int,
+        content_type: str = "application/octet-stream"
+    ) -> str:
+        result = self.client.put_object(bucket, key, stream, length=length, content_type=content_type)
+        return (result.etag or "").strip('"')
+
+    def put_if_match(
+        self,
+        bucket: str,
+        key: str,
+        data: bytes,
+        etag: Optional[str],
+        content_type: str = "application/octet-stream"
+    ) -> str:
+        headers = {"Content-Type": content_type}
+        if etag:
+            headers["If-Match"] = f'"{etag}"'
+        else:
+            headers["If-None-Match"] = "*"
+        try:
+            # put_object has no conditional headers: this is the request it makes
+            result = self.client._put_object(bucket, key, data, headers)
+        except S3Error as e:
+            if e.code == "PreconditionFailed":
+                raise PreconditionFailedError(f"{bucket}/{key} was changed by another writer") from e
+            raise
+        return (result.etag or "").strip('"')
+
+    def put_file(
+        self,
+        bucket: str,
+        key: str,
+        file_path: str,
+        content_type: str = "application/octet-stream"
+    ) -> str:
+        result = self.client.fput_object(bucket, key, file_path, content_type=content_type)
+        return (result.etag or "").strip('"')
+
+    def _upload_part(self, bucket: str, key: str, upload_id: str, number: int, data: bytes, retries: int) -> Part:
+        for attempt in range(retries + 1):
+            try:
+                etag = self.client._upload_part(bucket, key, data, None, upload_id, number)
+                return Part(number, etag)
+            except (S3Error, ServerError, InvalidResponseError, urllib3.exceptions.HTTPError, OSError) as e:
+                if attempt == retries:
+                    raise
+                delay = UPLOAD_RETRY_BACKOFF * 2 ** attempt
+                logger.warning(f"Part {number} of {bucket}/{key} failed ({e}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+    def put_file_parts(
+        self,
+        bucket: str,
+        key: str,
+        file_path: str,
+        part_size: int,
+        max_workers: int = 1,
+        retries: int = 0,
+        hasher: Any = None,
+        content_type: str = "application/octet-stream",
+        length: Optional[int] = None
+    ) -> str:
+        size = os.path.getsize(file_path) if length is None else length
+        part_size = min(max(part_size, MIN_PART_SIZE, -(-size // MAX_MULTIPART_COUNT)), MAX_PART_SIZE)
+        if size <= part_size:
+            return super().put_file_parts(
+                bucket, key, file_path, part_size, hasher=hasher, content_type=content_type, length=size
+            )
+
+        # minio-py has no public multipart API: these are the calls fput_object makes
+        upload_id = self.client._create_multipart_upload(bucket, key, {"Content-Type": content_type})
+        try:
+            parts = []
+            pending = deque()
+            read = 0
+            with open(file_path, "rb") as f, ThreadPoolExecutor(max_workers=max_workers) as pool:
+                # Parts are read in order, so at most max_workers + 1 are in memory
+                for number in range(1, -(-size // part_size) + 1):
+                    data = f.read(min(part_size, size - read))
+                    read += len(data)
+                    if hasher is not None:
+                        hasher.update(data)
+                    if len(pending) >= max_workers:
+                        parts.append(pending.popleft().result())
+                    pending.append(pool.submit(self._upload_part, bucket, key, upload_id, number, data, retries))
+                parts.extend(future.result() for future in pending)
+            # Bytes appended after `length` are not uploaded; any other change is an error
+            if read != size or (length is None and os.path.getsize(file_path) != size):
+                raise StorageError(f"{file_path} changed during upload")
+            result = self.client._complete_multipart_upload(bucket, key, upload_id, parts)
+        except BaseException:
+            try:
+                self.client._abort_multipart_upload(bucket, key, upload_id)
+            except Exception as e:
+                logger.warning(f"Failed to abort multipart upload of {bucket}/{key}: {e}")
+            raise
+        return (result.etag or "").strip('"')
+
+    def list_objects(self, bucket: str, prefix: str = "", recursive: bool = False) -> Iterator[ObjectInfo]:
+        for obj in self.client.list_objects(bucket, prefix=prefix or None, recursive=recursive):
+            yield ObjectInfo(
+                bucket=bucket,
+                key=obj.object_name,
+                size=obj.size or 0,
+                etag=(obj.etag or "").strip('"'),
+                last_modified=obj.last_modified,
+                is_dir=obj.is_dir
+            )
+
+    def stat(self, bucket: str, key: str) -> Optional[ObjectInfo]:
+        try:
+            stat = self.client.stat_object(bucket, key)
+        except S3Error as e:
+            if _is_not_found(e):
+                return None
+            raise
+        return ObjectInfo(
+            bucket=bucket,
+            key=key,
+            size=stat.size,
+            etag=(stat.etag or "").strip('"'),
+            last_modified=stat.last_modified,
+            content_type=stat.content_type or "application/octet-stream"
+        )
+
+    def copy(self, source_bucket: str, source_key: str, target_bucket: str, target_key: str) -> str:
+        """
+        Copy an object server-side.
+
+        minio switches to a multipart compose for objects over 5 GiB.
+        Servers that do not implement server-side copy get a streamed
+        GET/PUT with bounded memory instead.
+
+        Returns:
+            "server_side" or "streamed".
+        """
+        try:
+            self.client.copy_object(target_bucket, target_key, CopySource(source_bucket, source_key))
+            return "server_side"
+        except S3Error as e:
+            if e.code not in ("NotImplemented", "MethodNotAllowed"):
+                raise
+        except ServerError as e:
+            if e.status_code != 501:
+                raise
+
+        logger.info(f"Server-side copy unavailable, streaming {source_bucket}/{source_key}")
+        stat = self.stat(source_bucket, source_key)
+        if stat is None:
+            raise ObjectNotFoundError(f"{source_bucket}/{source_key}")
+        response = self._get_object(source_bucket, source_key)
+        try:
+            self.put_stream(target_bucket, target_key, response, stat.size, stat.content_type)
+        finally:
+            response.close()
+            response.release_conn()
+        return "streamed"
+
+    def delete(self, bucket: str, keys: list[str]) -> None:
+        if not keys:
+            return
+        for error in self.client.remove_objects(bucket, [DeleteObject(key) for key in keys]):
+            logger.warning(f"Failed to remove {bucket}/{error.name}: {error.message}")
+
+
+class LocalStorage(StorageBackend):
+    """
+    Storage in a local directory: <root>/<bucket>/<key>.
+
+    Writes go to a temporary file renamed into place, so readers never see
+    a partial object and a replaced object gets a new inode. The ETag is
+    derived from the inode, size and mtime, and needs no read of the file.
+    """
+
+    name = "local"
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+        self._condition_lock = threading.Lock()
+
+    def _bucket_path(self, bucket: str) -> str:
+        return os.path.join(self.root, bucket)
+
+    def _path(self, bucket: str, key: str) -> str:
+        parts = key.split("/")
+        if any(part in ("", ".", "..") for part in parts):
+            raise StorageError(f"Invalid object key: {key}")
+        return os.path.join(self.root, bucket, *parts)
+
+    @staticmethod
+    def _etag(st: os.stat_result) -> str:
+        return f"{st.st_ino:x}-{st.st_size:x}-{st.st_mtime_ns:x}"
+
+    @staticmethod
+    def _is_temporary(name: str) -> bool:
+        return name.startswith(".") and name.endswith(".tmp")
+
+    def _open(self, bucket: str, key: str) -> BinaryIO:
+        try:
+            return open(self._path(bucket, key), "rb")
+        except (FileNotFoundError, NotADirectoryError, IsADirectoryError) as e:
+            raise ObjectNotFoundError(f"{bucket}/{key}") from e
+
+    def _info(self, bucket: str, key: str, st: os.stat_result) -> ObjectInfo:
+        return ObjectInfo(
+            bucket=bucket,
+            key=key,
+            size=st.st_size,
+            etag=self._etag(st),
+            last_modified=datetime.fromtimestamp(st.st_mtime, tz=timezone.utc),
+            content_type=mimetypes.guess_type(key)[0] or "application/octet-stream"
+        )
+
+    def ensure_bucket(self, bucket: str) -> None:
+        os.makedirs(self._bucket_path(bucket), exist_ok=True)
+
+    def get(self, bucket: str, key: str) -> bytes:
+        with self._open(bucket, key) as f:
+            return f.read()
+
+    def get_with_etag(
+        self,
+        bucket: str,
+        key: str,
+        if_none_match: Optional[str] = None
+    ) -> tuple[Optional[bytes], str]:
+        with self._open(bucket, key) as f:
+            etag = self._etag(os.fstat(f.fileno()))
+            if if_none_match and etag == if_none_match:
+                return None, etag
+            return f.read(), etag
+
+    def get_range(self, bucket: str, key: str, offset: int, length: int) -> bytes:
+        with self._open(bucket, key) as f:
+            f.seek(offset)
+            return f.read(length)
+
+    def get_buffer(self, bucket: str, key: str) -> pa.Buffer:
+        """Memory-map the object; the buffer keeps the mapping alive."""
+        path = self._path(bucket, key)
+        try:
+            if os.path.getsize(path) == 0:
+                return pa.py_buffer(b"")
+            return pa.memory_map(path, "r").read_buffer()
+        except FileNotFoundError as e:
+            raise ObjectNotFoundError(f"{bucket}/{key}") from e
+
+    def stream(self, bucket: str, key: str, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+        with self._open(bucket, key) as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+
+    def _write_atomic(self, bucket: str, key: str, write) -> str:
+        """Write through a temporary file renamed to the object path; return the ETag."""
+        path = self._path(bucket, key)
+        if not os.path.isdir(self._bucket_path(bucket)):
+            raise ObjectNotFoundError(f"Bucket does not exist: {bucket}")
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+        try:
+            # mkstemp creates the file private to its owner
+            os.chmod(tmp_path, OBJECT_FILE_MODE)
+            with os.fdopen(fd, "wb") as f:
+                write(f, tmp_path)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return self._etag(os.stat(path))
+
+    def put(
+        self,
+        bucket: str,
+        key: str,
+        data: bytes,
+        content_type: str = "application/octet-stream"
+    ) -> str:
+        return self._write_atomic(bucket, key, lambda f, _: f.write(data))
+
+    def put_if_match(
+        self,
+        bucket: str,
+        key: str,
+        data: bytes,
+        etag: Optional[str],
+        content_type: str = "application/octet-stream"
+    ) -> str:
+        """Compare and rename under a lock shared by the conditional writers of the object."""
+        path = self._path(bucket, key)
+        if not os.path.isdir(self._bucket_path(bucket)):
+            raise ObjectNotFoundError(f"Bucket does not exist: {bucket}")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Named like a temporary file, so listings skip it
+        lock_path = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.lock.tmp")
+        with self._condition_lock, open(lock_path, "a") as lock:
+            if fcntl is not None:
+                # Other processes writing the same object
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                current = self._etag(os.stat(path))
+            except FileNotFoundError:
+                current = None
+            if current != (etag or None):
+                raise PreconditionFailedError(f"{bucket}/{key} was changed by another writer")
+            return self.put(bucket, key, data, content_type)
+
+    def put_stream(
+        self,
+        bucket: str,
+        key: str,
+        stream: BinaryIO,
+        length: int,
+        content_type: str = "application/octet-stream"
+    ) -> str:
+        def write(f, _):
+            remaining = length
+            while remaining != 0:
+                chunk = stream.read(STREAM_CHUNK_SIZE if remaining < 0 else min(remaining, STREAM_CHUNK_SIZE))
+                if not chunk:
+                    break
+                f.write(chunk)
+                remaining -= len(chunk) if remaining > 0 else 0
+
+        return self._write_atomic(bucket, key, write)
+
+    def put_file(
+        self,
+        bucket: str,
+        key: str,
+        file_path: str,
+        content_type: str = "application/octet-stream"
+    ) -> str:
+        # copyfile uses the kernel copy (sendfile/copy_file_range) when available
+        return self._write_atomic(bucket, key, lambda f, tmp_path: shutil.copyfile(file_path, tmp_path))
+
+    def list_objects(self, bucket: str, prefix: str = "", recursive: bool = False) -> Iterator[ObjectInfo]:
+        bucket_path = self._bucket_path(bucket)
+        if not os.path.isdir(bucket_path):
+            return
+
+        keys = []
+        for directory, _, files in os.walk(bucket_path):
+            relative = os.path.relpath(directory, bucket_path)
+            base = "" if relative == "." else relative.replace(os.sep, "/") + "/"
+            for name in files:
+                if not self._is_temporary(name) and (base + name).startswith(prefix):
+                    keys.append(base + name)
+
+        seen_dirs = set()
+        for key in sorted(keys):
+            rest = key[len(prefix):]
+            if not recursive and "/" in rest:
+                dir_key = prefix + rest.split("/", 1)[0] + "/"
+                if dir_key not in seen_dirs:
+                    seen_dirs.add(dir_key)
+                    yield ObjectInfo(bucket=bucket, key=dir_key, is_dir=True)
+                continue
+            try:
+                st = os.stat(self._path(bucket, key))
+            except FileNotFoundError:
+                continue
+            yield self._info(bucket, key, st)
+
+    def stat(self, bucket: str, key: str) -> Optional[ObjectInfo]:
+        try:
+            st = os.stat(self._path(bucket, key))
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+        return self._info(bucket, key, st)
+
+    def copy(self, source_bucket: str, source_key: str, target_bucket: str, target_key: str) -> str:
+        """
+        Hard-link the object when possible, else copy it in the kernel.
+
+        Objects are never modified in place, so sharing the inode is safe.
+
+        Returns:
+            "linked" or "copied".
+        """
+        source = self._path(source_bucket, source_key)
+        target = self._path(target_bucket, target_key)
+        if not os.path.exists(source):
+            raise ObjectNotFoundError(f"{source_bucket}/{source_key}")
+        if not os.path.isdir(self._bucket_path(target_bucket)):
+            raise ObjectNotFoundError(f"Bucket does not exist: {target_bucket}")
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+
+        tmp_path = os.path.join(os.path.dirname(target), f".{uuid.uuid4().hex}.tmp")
+        try:
+            os.link(source, tmp_path)
+            method = "linked"
+        except OSError:
+            shutil.copyfile(source, tmp_path)
+            method = "copied"
+        os.replace(tmp_path, target)
+        # rename() is a no-op when both names already link to the same inode
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return method
+
+    def delete(self, bucket: str, keys: list[str]) -> None:
+        for key in keys:
+            try:
+                os.remove(self._path(bucket, key))
+            except FileNotFoundError:
+                pass
+
+
+_ABORT = object()
+
+
+class _HashingReader(io.RawIOBase):
+    """Reader that feeds what it reads to a hasher."""
+
+    def __init__(self, raw: BinaryIO, hasher: Any):
+        self._raw = raw
+        self._hasher = hasher
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        n = self._raw.readinto(b)
+        if n:
+            self._hasher.update(memoryview(b)[:n])
+        return n
+
+
+class _ChunkPipe(io.RawIOBase):
+    """Readable stream of the chunks pushed into a bounded queue by another thread."""
+
+    def __init__(self, max_chunks: int):
+        super().__init__()
+        self._queue: queue.Queue = queue.Queue(maxsize=max_chunks)
+        self._pending = b""
+        self._eof = False
+
+    def readable(self) -> bool:
+        return True
+
+    def push(self, chunk: Any, stopped: threading.Event) -> None:
+        """Queue a chunk (None marks the end), giving up once the reader has stopped."""
+        while not stopped.is_set():
+            try:
+                self._queue.put(chunk, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+        raise StorageError("Upload stopped before all data was sent")
+
+    def readinto(self, b) -> int:
+        while not self._pending and not self._eof:
+            chunk = self._queue.get()
+            if chunk is _ABORT:
+                raise StorageError("Upload aborted by the writer")
+            if chunk is None:
+                self._eof = True
+            else:
+                self._pending = chunk
+        n = min(len(b), len(self._pending))
+        b[:n] = self._pending[:n]
+        self._pending = self._pending[n:]
+        return n
+
+
+class StreamingUpload:
+    """
+    Upload an object from chunks written by the caller.
+
+    The upload runs on a background thread that reads from a bounded queue,
+    so the caller can stream a file once into the object store while using
+    the same bytes for something else. Memory is bounded by max_chunks.
+    Exactly `length` bytes must be written.
+    """
+
+    def __init__(
+        self,
+        storage: StorageBackend,
+        bucket: str,
+        key: str,
+        length: int,
+        content_type: str = "application/octet-stream",
+        max_chunks: int = 8
+    ):
+        self._pipe = _ChunkPipe(max_chunks)
+        self._length = length
+        self._written = 0
+        # Set when the upload thread has exited, successfully or not
+        self._stopped = threading.Event()
+        self._error: Optional[BaseException] = None
+        self._etag = ""
+        self._thread = threading.Thread(
+            target=self._run,
+            args=(storage, bucket, key, length, content_type),
+            name=f"upload-{bucket}/{key}",
+            daemon=True
+        )
+        self._thread.start()
+
+    def _run(self, storage: StorageBackend, bucket: str, key: str, length: int, content_type: str) -> None:
+        try:
+            self._etag = storage.put_stream(bucket, key, self._pipe, length, content_type)
+        except BaseException as e:
+            self._error = e
+        finally:
+            self._stopped.set()
+
+    def write(self, chunk: bytes) -> None:
+        """Send a chunk to the upload; raises StorageError once the upload has stopped."""
+        if not chunk:
+            return
+        if self._written + len(chunk) > self._length:
+            raise StorageError(f"More data written than the {self._length} bytes announced")
+        self._pipe.push(bytes(chunk), self._stopped)
+        self._written += len(chunk)
+
+    def abort(self) -> None:
+        """Cancel the upload; nothing is stored."""
+        try:
+            self._pipe.push(_ABORT, self._stopped)
+        except StorageError:
+            pass
+        self._thread.join()
+
+    def close(self) -> str:
+        """Finish the upload and return the ETag; re-raises an upload error."""
+        if self._written != self._length:
+            self.abort()
+            raise StorageError(f"Only {self._written} of the {self._length} bytes announced were written")
+        try:
+            # The upload may have returned as soon as it read `length` bytes
+            self._pipe.push(None, self._stopped)
+        except StorageError:
+            pass
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+        return self._etag
+
+
+_storage: Optional[StorageBackend] = None
+_storage_lock = threading.Lock()
+
+
+def get_storage() -> StorageBackend:
+    """Return the process-wide storage backend selected by STORAGE_BACKEND."""
+    global _storage
+
+    if _storage is None:
+        with _storage_lock:
+            if _storage is None:
+                if STORAGE_BACKEND == "local":
+                    _storage = LocalStorage(LOCAL_STORAGE_ROOT)
+                elif STORAGE_BACKEND == "minio":
+                    _storage = MinioStorage()
+                else:
+                    raise ValueError(f"Unknown storage backend: {STORAGE_BACKEND}")
+    return _storage
+
+
+def move_to_quarantine(
+    storage: StorageBackend,
+    source_bucket: str,
+    object_name: str,
+    reason: str
+) -> str:
+    """Move invalid file to quarantine bucket with reason."""
+    storage.ensure_bucket(BUCKET_QUARANTINE)
+
+    # Create quarantine path with timestamp
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    quarantine_name = f"{timestamp}/{object_name}"
+
+    storage.copy(source_bucket, object_name, BUCKET_QUARANTINE, quarantine_name)
+
+    # Save quarantine metadata
+    quarantine_metadata = {
+        "original_bucket": source_bucket,
+        "original_name": object_name,
+        "reason": reason,
+        "quarantined_at": datetime.now().isoformat()
+    }
+    metadata_json = json.dumps(quarantine_metadata, indent=2).encode("utf-8")
+    storage.put(
+        BUCKET_QUARANTINE,
+        f"{quarantine_name}.reason.json",
+        metadata_json,
+        content_type="application/json"
+    )
+
+    logger.warning(f"Moved {object_name} to quarantine: {reason}")
+    return quarantine_name
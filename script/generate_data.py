@@ -1,19 +1,141 @@
+import argparse
 import csv
 import random
-from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
 from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
 from faker import Faker
 
 fake = Faker()
 Faker.seed(42)
 random.seed(42)
 
+DEFAULT_SEED = 42
+
+# Date the generated dates are relative to, fixed so that a seed gives the
+# same files whatever the day they are generated
+DEFAULT_REFERENCE_DATE = date(2025, 6, 30)
+# Dates of the future_date defect count from here, far enough ahead to stay
+# in the future without depending on today's date
+FUTURE_DATE_BASE = date(2099, 1, 1)
+
+# Number of clients generated per chunk in vectorized mode. Purchases are
+# generated per client chunk, so a chunk holds roughly
+# CHUNK_SIZE * avg_purchase_per_clients purchase rows in memory.
+CHUNK_SIZE = 200_000
+
+COUNTRIES = ["France", "Germany", "Spain", "Italy", "Belgium", "Netherlands", "Sweden", "UK", "Canada"]
+PRODUCTS = ["Laptop", "Phone", "Tablet", "Headphones", "Smartwatch", "Camera", "Printer", "Monitor", "Keyboard", "Mouse"]
+
+CLIENT_COLUMNS = ["id_client", "nom", "email", "date_inscription", "pays"]
+ACHAT_COLUMNS = ["id_achat", "id_client", "date_achat", "montant", "produit"]
+
+# Independent random streams, so that purchase counts can be drawn without
+# generating the purchase rows themselves.
+STREAM_CLIENTS = 1
+STREAM_ACHAT_COUNTS = 2
+STREAM_ACHAT_ROWS = 3
+STREAM_DELTA_CLIENTS = 4
+STREAM_DELTA_ACHATS = 5
+STREAM_DEFECTS_CLIENTS = 6
+STREAM_DEFECTS_ACHATS = 7
+
+# Share of each kind of change in a daily delta of purchases
+DELTA_MIX = {
+    "new": 0.6,
+    "late": 0.1,
+    "corrected": 0.2,
+    "deleted": 0.1,
+}
+# Defects that can be injected in each entity. Bounds mirror
+# VALIDATION_RULES and the critical columns of clean_clients/clean_achats
+# in flows/, which this standalone script does not import.
+#   null_critical: empty value in a critical column
+#   bad_email: email without '@'
+#   duplicate_id: primary key copied from an earlier row of the chunk
+#   amount_out_of_range: montant <= montant_min or > montant_max
+#   future_date: date after today
+#   bad_date: unparseable date string
+#   orphan_fk: id_client that does not exist in clients
+#   malformed_line: truncated CSV line (pandas fills missing fields)
+#   overflow_line: CSV line with extra fields (pandas rejects the whole file)
+DEFECTS = {
+    "clients": ["null_critical", "bad_email", "duplicate_id", "future_date", "bad_date",
+                "malformed_line", "overflow_line"],
+    "achats": ["null_critical", "duplicate_id", "amount_out_of_range", "future_date", "bad_date",
+               "orphan_fk", "malformed_line", "overflow_line"],
+}
+CRITICAL_COLUMNS = {
+    "clients": ["id_client", "nom", "email", "pays"],
+    "achats": ACHAT_COLUMNS,
+}
+PRIMARY_KEYS = {"clients": "id_client", "achats": "id_achat"}
+DATE_COLUMNS = {"clients": "date_inscription", "achats": "date_achat"}
+MONTANT_MIN = 0
+MONTANT_MAX = 10000
+BAD_DATES = ["2024-13-45", "31/02/2024", "not a date", "20240230", "2024-02-30T25:61"]
+
+# Total share of defective rows, split evenly across the defects of an
+# entity. overflow_line makes the whole file fail validation, so presets
+# leave it out; enable it explicitly with a per-defect rate.
+DIRTY_LEVELS = {
+    "clean": 0.0,
+    "dirty_5": 0.05,
+    "dirty_30": 0.30,
+}
+
+# Operation codes of the "op" column of delta files
+OP_INSERT = "I"
+OP_UPDATE = "U"
+OP_DELETE = "D"
+
+# Distribution profiles of the vectorized generator. Each profile overrides
+# the keys of DEFAULT_PROFILE it needs:
+#   purchases: "uniform" (1..2*avg per client) or "zipf" (heavy-tailed counts)
+#   zipf_exponent: exponent of the Zipf distribution of purchases per client
+#   whale_rate / whale_factor: share of clients whose purchase count is multiplied
+#   seasonal: weight purchase dates towards sales periods and year-end
+#   n_products / product_exponent: size and Zipf popularity of the catalogue
+#   country_weights: probability of each entry of COUNTRIES
+DEFAULT_PROFILE = {
+    "purchases": "uniform",
+    "zipf_exponent": 2.0,
+    "whale_rate": 0.0,
+    "whale_factor": 1,
+    "seasonal": False,
+    "n_products": None,
+    "product_exponent": 1.1,
+    "country_weights": None,
+}
+
+SKEWED_COUNTRY_WEIGHTS = [0.62, 0.14, 0.08, 0.06, 0.04, 0.03, 0.015, 0.01, 0.005]
+
+PROFILES = {
+    "uniform": {},
+    "zipf": {"purchases": "zipf"},
+    "whales": {"whale_rate": 0.001, "whale_factor": 200},
+    "seasonal": {"seasonal": True},
+    "long_tail": {"n_products": 5000},
+    "country_skew": {"country_weights": SKEWED_COUNTRY_WEIGHTS},
+    "production": {
+        "purchases": "zipf",
+        "whale_rate": 0.001,
+        "whale_factor": 200,
+        "seasonal": True,
+        "n_products": 5000,
+        "country_weights": SKEWED_COUNTRY_WEIGHTS,
+    },
+}
+
+
 def generate_clients(n_clients: int, output_path: str) -> list[int]:
-    countries = ["France", "Germany", "Spain", "Italy", "Belgium", "Netherlands", "Sweden", "UK", "Canada"]
-    
     clients = []
     client_ids = []
-    
+
     for i in range(1, n_clients + 1):
         date_inscription = fake.date_between(start_date='-3y', end_date='-1m')
         clients.append({
@@ -21,17 +143,17 @@ def generate_clients(n_clients: int, output_path: str) -> list[int]:
             "nom": fake.name(),
             "email": fake.email(),
             "date_inscription": date_inscription.strftime("%Y-%m-%d"),
-            "pays": random.choice(countries)
+            "pays": random.choice(COUNTRIES)
         })
         client_ids.append(i)
-        
+
     Path(output_path).parent.mkdir(parents=True, exist_ok=True)
-    
+
     with open(output_path, 'w', newline='', encoding='utf-8') as file:
-        writer = csv.DictWriter(file, fieldnames=["id_client", "nom", "email", "date_inscription", "pays"])
+        writer = csv.DictWriter(file, fieldnames=CLIENT_COLUMNS)
         writer.writeheader()
         writer.writerows(clients)
-        
+
     print(f"Generated {n_clients} clients to {output_path}")
     return client_ids
 
@@ -45,8 +167,6 @@ def generate_achats(client_ids: list[int], avg_purchase_per_clients: int, output
         output_path (str): Path to save the generated CSV file.
     """
 
-    products = ["Laptop", "Phone", "Tablet", "Headphones", "Smartwatch", "Camera", "Printer", "Monitor", "Keyboard", "Mouse"]
-
     achats = []
     id_achat = 1
 
@@ -60,20 +180,862 @@ def generate_achats(client_ids: list[int], avg_purchase_per_clients: int, output
                 "id_client": id_client,
                 "date_achat": date_achat.strftime("%Y-%m-%d"),
                 "montant": round(random.uniform(10.0, 2000.0), 2),
-                "produit": random.choice(products)
+                "produit": random.choice(PRODUCTS)
             })
             id_achat += 1
 
     Path(output_path).parent.mkdir(parents=True, exist_ok=True)
 
     with open(output_path, 'w', newline='', encoding='utf-8') as file:
-        writer = csv.DictWriter(file, fieldnames=["id_achat", "id_client", "date_achat", "montant", "produit"])
+        writer = csv.DictWriter(file, fieldnames=ACHAT_COLUMNS)
         writer.writeheader()
         writer.writerows(achats)
 
     print(f"Generated {len(achats)} purchases to {output_path}")
+
+
+# ============== Vectorized generation ==============
+
+def get_profile(name: str) -> dict:
+    """Return the full parameters of a named distribution profile."""
+    if name not in PROFILES:
+        raise ValueError(f"Unknown profile {name!r}, expected one of {sorted(PROFILES)}")
+    return {**DEFAULT_PROFILE, **PROFILES[name]}
+
+
+def chunk_rng(seed: int, stream: int, chunk_index: int) -> np.random.Generator:
+    """
+    Derive the random generator of one chunk.
+
+    Each chunk gets its own generator seeded from (seed, stream, chunk_index),
+    so the output only depends on the seed and the chunk size, never on the
+    order in which chunks are generated.
+    """
+    return np.random.default_rng([seed, stream, chunk_index])
+
+
+def build_vocabularies(seed: int = DEFAULT_SEED, size: int = 1000) -> dict[str, np.ndarray]:
+    """
+    Precompute name and email vocabularies with Faker.
+
+    Faker is only called a few thousand times here; rows then pick
+    entries from these arrays by index.
+
+    Args:
+        seed: Seed for the Faker instance.
+        size: Number of draws for first and last names.
+
+    Returns:
+        Dictionary of NumPy arrays: first_names, last_names, email_first,
+        email_last and domains. email_* arrays are aligned with the name arrays.
+    """
+    vocab_fake = Faker()
+    vocab_fake.seed_instance(seed)
+
+    first_names = sorted({vocab_fake.first_name() for _ in range(size)})
+    last_names = sorted({vocab_fake.last_name() for _ in range(size)})
+    domains = sorted({vocab_fake.free_email_domain() for _ in range(50)})
+
+    def to_email_part(name: str) -> str:
+        return "".join(c for c in name.lower() if c.isalnum())
+
+    return {
+        "first_names": np.array(first_names, dtype=object),
+        "last_names": np.array(last_names, dtype=object),
+        "email_first": np.array([to_email_part(n) for n in first_names], dtype=object),
+        "email_last": np.array([to_email_part(n) for n in last_names], dtype=object),
+        "domains": np.array(domains, dtype=object),
+    }
+
+
+def build_catalogue(profile: dict) -> tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Build the product catalogue of a profile.
+
+    Returns:
+        Tuple of (product names, selection probabilities). Probabilities are
+        None for the uniform 10-product catalogue.
+    """
+    n_products = profile["n_products"]
+    if not n_products:
+        return np.array(PRODUCTS, dtype=object), None
+
+    # SKUs cycle through the base products: "Laptop 0001", "Phone 0001", ...
+    names = np.array(
+        [f"{PRODUCTS[i % len(PRODUCTS)]} {i // len(PRODUCTS) + 1:04d}" for i in range(n_products)],
+        dtype=object
+    )
+    weights = 1.0 / np.arange(1, n_products + 1) ** profile["product_exponent"]
+    return names, weights / weights.sum()
+
+
+def seasonal_day_weights(reference_date: date, n_days: int) -> np.ndarray:
+    """
+    Probability of each day offset (0..n_days-1 before reference_date) under the
+    seasonal profile: Black Friday week, Christmas and January sales peaks.
+    """
+    dates = pd.to_datetime(days_before(reference_date, np.arange(n_days)))
+    month, day = dates.month, dates.day
+
+    weights = np.ones(n_days)
+    weights[(month == 11) & (day >= 20)] = 5.0
+    weights[(month == 12) & (day <= 24)] = 3.0
+    weights[(month == 1) & (day >= 8)] = 2.0
+    weights[month.isin([7, 8])] = 1.5
+    return weights / weights.sum()
+
+
+def days_before(reference_date: date, offsets: np.ndarray) -> np.ndarray:
+    """Convert day offsets before reference_date into 'YYYY-MM-DD' strings."""
+    dates = np.datetime64(reference_date, "D") - offsets.astype("timedelta64[D]")
+    return dates.astype(str)
+
+
+def iter_chunks(n_clients: int, chunk_size: int):
+    """Yield (chunk_index, first_id_client, n_clients_in_chunk) tuples."""
+    for chunk_index, start in enumerate(range(1, n_clients + 1, chunk_size)):
+        yield chunk_index, start, min(chunk_size, n_clients - start + 1)
+
+
+def build_clients_chunk(
+    chunk_index: int,
+    start_id: int,
+    size: int,
+    vocab: dict[str, np.ndarray],
+    seed: int,
+    reference_date: date,
+    profile: dict = DEFAULT_PROFILE,
+    stream: int = STREAM_CLIENTS
+) -> pd.DataFrame:
+    """Generate one chunk of clients as a DataFrame."""
+    rng = chunk_rng(seed, stream, chunk_index)
+
+    ids = np.arange(start_id, start_id + size, dtype=np.int64)
+    first_idx = rng.integers(0, len(vocab["first_names"]), size)
+    last_idx = rng.integers(0, len(vocab["last_names"]), size)
+    domain_idx = rng.integers(0, len(vocab["domains"]), size)
+
+    # Between 3 years and 1 month before the reference date
+    inscription_offsets = rng.integers(30, 3 * 365 + 1, size)
+    if profile["country_weights"]:
+        country_idx = rng.choice(len(COUNTRIES), size, p=profile["country_weights"])
+    else:
+        country_idx = rng.integers(0, len(COUNTRIES), size)
+
+    first = pd.Series(vocab["first_names"][first_idx])
+    last = pd.Series(vocab["last_names"][last_idx])
+    # The id in the local part keeps emails unique
+    email = (
+        pd.Series(vocab["email_first"][first_idx]) + "."
+        + pd.Series(vocab["email_last"][last_idx])
+        + pd.Series(ids.astype(str)) + "@"
+        + pd.Series(vocab["domains"][domain_idx])
+    )
+
+    return pd.DataFrame({
+        "id_client": ids,
+        "nom": first + " " + last,
+        "email": email,
+        "date_inscription": days_before(reference_date, inscription_offsets),
+        "pays": np.array(COUNTRIES, dtype=object)[country_idx]
+    })
+
+
+def draw_purchase_counts(
+    chunk_index: int,
+    size: int,
+    avg_purchase_per_clients: int,
+    seed: int,
+    profile: dict = DEFAULT_PROFILE
+) -> np.ndarray:
+    """
+    Draw the number of purchases of each client of a chunk.
+
+    Under the zipf profile, avg_purchase_per_clients only bounds the tail:
+    counts are capped at 200 times the average.
+    """
+    rng = chunk_rng(seed, STREAM_ACHAT_COUNTS, chunk_index)
+
+    if profile["purchases"] == "zipf":
+        counts = np.minimum(rng.zipf(profile["zipf_exponent"], size), avg_purchase_per_clients * 200)
+    else:
+        counts = rng.integers(1, avg_purchase_per_clients * 2 + 1, size)
+
+    if profile["whale_rate"]:
+        whales = rng.random(size) < profile["whale_rate"]
+        counts[whales] *= profile["whale_factor"]
+
+    return counts
+
+
+def build_achats_chunk(
+    chunk_index: int,
+    start_id: int,
+    counts: np.ndarray,
+    first_id_achat: int,
+    seed: int,
+    reference_date: date,
+    profile: dict = DEFAULT_PROFILE,
+    catalogue: Optional[tuple[np.ndarray, Optional[np.ndarray]]] = None
+) -> pd.DataFrame:
+    """Generate the purchases of one client chunk as a DataFrame."""
+    rng = chunk_rng(seed, STREAM_ACHAT_ROWS, chunk_index)
+
+    n_rows = int(counts.sum())
+    client_ids = np.repeat(np.arange(start_id, start_id + len(counts), dtype=np.int64), counts)
+
+    products, product_weights = catalogue or build_catalogue(profile)
+
+    # Between 2 years ago and the reference date
+    n_days = 2 * 365 + 1
+    if profile["seasonal"]:
+        achat_offsets = rng.choice(n_days, n_rows, p=seasonal_day_weights(reference_date, n_days))
+    else:
+        achat_offsets = rng.integers(0, n_days, n_rows)
+    montants = np.round(rng.uniform(10.0, 2000.0, n_rows), 2)
+    if product_weights is not None:
+        product_idx = rng.choice(len(products), n_rows, p=product_weights)
+    else:
+        product_idx = rng.integers(0, len(products), n_rows)
+
+    return pd.DataFrame({
+        "id_achat": np.arange(first_id_achat, first_id_achat + n_rows, dtype=np.int64),
+        "id_client": client_ids,
+        "date_achat": days_before(reference_date, achat_offsets),
+        "montant": montants,
+        "produit": products[product_idx]
+    })
+
+
+def build_defect_rates(level: str = "clean", overrides: Optional[dict[str, float]] = None) -> dict[str, dict[str, float]]:
+    """
+    Build per-entity defect rates from a dirty level and per-defect overrides.
+
+    Args:
+        level: Name of a DIRTY_LEVELS entry.
+        overrides: Rates of individual defects, applied to every entity having them.
+
+    Returns:
+        Dictionary entity -> {defect: rate}, only with non-zero rates.
+    """
+    if level not in DIRTY_LEVELS:
+        raise ValueError(f"Unknown dirty level {level!r}, expected one of {sorted(DIRTY_LEVELS)}")
+
+    rates = {}
+    for entity, defects in DEFECTS.items():
+        preset = [d for d in defects if d != "overflow_line"]
+        entity_rates = {d: DIRTY_LEVELS[level] / len(preset) for d in preset}
+        for defect, rate in (overrides or {}).items():
+            if defect not in DEFECTS["clients"] + DEFECTS["achats"]:
+                raise ValueError(f"Unknown defect {defect!r}")
+            if defect in defects:
+                entity_rates[defect] = rate
+        rates[entity] = {d: r for d, r in entity_rates.items() if r > 0}
+    return rates
+
+
+def corrupt_chunk(
+    df: pd.DataFrame,
+    entity: str,
+    rates: dict[str, float],
+    chunk_index: int,
+    seed: int,
+    n_clients: int
+) -> tuple[pd.DataFrame, dict[str, np.ndarray]]:
+    """
+    Inject defects in a generated chunk.
+
+    Each defect independently hits about rate * len(df) rows. Line-level
+    defects cannot be represented in a DataFrame, so their row positions are
+    returned for write_chunk.
+
+    Args:
+        df: Chunk built by build_clients_chunk or build_achats_chunk.
+        entity: "clients" or "achats".
+        rates: Defect rates of the entity (see build_defect_rates).
+        chunk_index: Index of the chunk, used to derive the random generator.
+        seed: Seed of the generation.
+        n_clients: Number of clients, to draw orphan foreign keys above it.
+
+    Returns:
+        Tuple of (corrupted DataFrame, {line defect: row positions}).
+    """
+    stream = STREAM_DEFECTS_CLIENTS if entity == "clients" else STREAM_DEFECTS_ACHATS
+    rng = chunk_rng(seed, stream, chunk_index)
+    n_rows = len(df)
+
+    def pick(defect: str) -> np.ndarray:
+        return np.flatnonzero(rng.random(n_rows) < rates.get(defect, 0.0))
+
+    # Nullable ids and object text columns, so any cell can become empty
+    df = df.astype({
+        col: "Int64" if col in ("id_client", "id_achat") else object
+        for col in df.columns if col != "montant"
+    })
+    pk = PRIMARY_KEYS[entity]
+    date_col = DATE_COLUMNS[entity]
+    critical = CRITICAL_COLUMNS[entity]
+
+    rows = pick("null_critical")
+    columns = np.array(critical, dtype=object)[rng.integers(0, len(critical), len(rows))]
+    for col in critical:
+        df.loc[rows[columns == col], col] = None
+
+    if entity == "clients":
+        rows = pick("bad_email")
+        df.loc[rows, "email"] = df.loc[rows, "email"].str.replace("@", " at ", regex=False)
+
+    rows = pick("duplicate_id")
+    rows = rows[rows > 0]
+    df.loc[rows, pk] = df[pk].to_numpy()[rng.integers(0, rows)]
+
+    if entity == "achats":
+        rows = pick("amount_out_of_range")
+        too_low = rng.random(len(rows)) < 0.5
+        df.loc[rows, "montant"] = np.where(
+            too_low,
+            np.round(MONTANT_MIN - rng.uniform(0, 500, len(rows)), 2),
+            np.round(rng.uniform(MONTANT_MAX + 0.01, MONTANT_MAX * 5, len(rows)), 2)
+        )
+
+        rows = pick("orphan_fk")
+        df.loc[rows, "id_client"] = n_clients + rng.integers(1, n_clients + 1, len(rows))
+
+    rows = pick("future_date")
+    df.loc[rows, date_col] = days_before(FUTURE_DATE_BASE, -rng.integers(1, 366, len(rows)))
+
+    rows = pick("bad_date")
+    df.loc[rows, date_col] = np.array(BAD_DATES, dtype=object)[rng.integers(0, len(BAD_DATES), len(rows))]
+
+    line_defects = {defect: pick(defect) for defect in ("malformed_line", "overflow_line")}
+    return df, line_defects
+
+
+def write_chunk(
+    df: pd.DataFrame,
+    file,
+    header: bool,
+    line_defects: Optional[dict[str, np.ndarray]] = None
+) -> None:
+    """
+    Append a DataFrame chunk to an open CSV file.
+
+    Args:
+        df: Chunk to write.
+        file: Open text file.
+        header: Whether to write the header line.
+        line_defects: Row positions to write as truncated (malformed_line)
+            or overflowing (overflow_line) CSV lines.
+    """
+    if not line_defects or not any(len(rows) for rows in line_defects.values()):
+        df.to_csv(file, header=header, index=False, float_format="%.2f")
+        return
+
+    lines = df.to_csv(header=False, index=False, float_format="%.2f").splitlines()
+    for row in line_defects.get("malformed_line", []):
+        lines[row] = lines[row].rsplit(",", 2)[0]
+    for row in line_defects.get("overflow_line", []):
+        lines[row] = lines[row] + ",,unexpected"
+
+    if header:
+        file.write(",".join(df.columns) + "\n")
+    file.write("\n".join(lines) + "\n")
+
+
+def write_entity_chunk(
+    df: pd.DataFrame,
+    entity: str,
+    file,
+    header: bool,
+    chunk_index: int,
+    seed: int,
+    defects: Optional[dict[str, dict[str, float]]],
+    n_clients: int
+) -> None:
+    """Inject the configured defects of an entity, if any, and write the chunk."""
+    line_defects = None
+    if defects and defects.get(entity):
+        df, line_defects = corrupt_chunk(df, entity, defects[entity], chunk_index, seed, n_clients)
+    write_chunk(df, file, header, line_defects)
+
+
+def generate_clients_vectorized(
+    n_clients: int,
+    output_path: str,
+    seed: int = DEFAULT_SEED,
+    chunk_size: int = CHUNK_SIZE,
+    reference_date: Optional[date] = None,
+    profile: str = "uniform",
+    defects: Optional[dict[str, dict[str, float]]] = None
+) -> int:
+    """
+    Generate fake client data in fixed-size NumPy chunks and save to a CSV file.
+
+    Client ids are the dense range 1..n_clients, so they are not returned
+    as a list; pass n_clients to generate_achats_vectorized instead.
+
+    Args:
+        n_clients: Number of clients to generate.
+        output_path: Path to save the generated CSV file.
+        seed: Seed of the generation; same seed and chunk_size give the same file.
+        chunk_size: Number of clients generated per chunk.
+        reference_date: Date the generated dates are relative to (default: DEFAULT_REFERENCE_DATE).
+        profile: Name of the distribution profile (see PROFILES).
+        defects: Defect rates to inject (see build_defect_rates), None for clean data.
+
+    Returns:
+        Number of clients written.
+    """
+    reference_date = reference_date or DEFAULT_REFERENCE_DATE
+    profile_params = get_profile(profile)
+    vocab = build_vocabularies(seed)
+
+    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+
+    with open(output_path, 'w', newline='', encoding='utf-8') as file:
+        for chunk_index, start_id, size in iter_chunks(n_clients, chunk_size):
+            df = build_clients_chunk(chunk_index, start_id, size, vocab, seed, reference_date, profile_params)
+            write_entity_chunk(df, "clients", file, chunk_index == 0, chunk_index, seed, defects, n_clients)
+
+    print(f"Generated {n_clients} clients to {output_path}")
+    return n_clients
+
+
+def generate_achats_vectorized(
+    n_clients: int,
+    avg_purchase_per_clients: int,
+    output_path: str,
+    seed: int = DEFAULT_SEED,
+    chunk_size: int = CHUNK_SIZE,
+    reference_date: Optional[date] = None,
+    profile: str = "uniform",
+    defects: Optional[dict[str, dict[str, float]]] = None
+) -> int:
+    """
+    Generate fake purchase data in fixed-size NumPy chunks and save to a CSV file.
+
+    Args:
+        n_clients: Number of clients (ids 1..n_clients) to generate purchases for.
+        avg_purchase_per_clients: Average number of purchases per client.
+        output_path: Path to save the generated CSV file.
+        seed: Seed of the generation; same seed and chunk_size give the same file.
+        chunk_size: Number of clients whose purchases are generated per chunk.
+        reference_date: Date the generated dates are relative to (default: DEFAULT_REFERENCE_DATE).
+        profile: Name of the distribution profile (see PROFILES).
+        defects: Defect rates to inject (see build_defect_rates), None for clean data.
+
+    Returns:
+        Number of purchases written.
+    """
+    reference_date = reference_date or DEFAULT_REFERENCE_DATE
+    profile_params = get_profile(profile)
+    catalogue = build_catalogue(profile_params)
+
+    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+
+    id_achat = 1
+    with open(output_path, 'w', newline='', encoding='utf-8') as file:
+        for chunk_index, start_id, size in iter_chunks(n_clients, chunk_size):
+            counts = draw_purchase_counts(chunk_index, size, avg_purchase_per_clients, seed, profile_params)
+            df = build_achats_chunk(
+                chunk_index, start_id, counts, id_achat, seed, reference_date, profile_params, catalogue
+            )
+            write_entity_chunk(df, "achats", file, chunk_index == 0, chunk_index, seed, defects, n_clients)
+            id_achat += len(df)
+
+    n_achats = id_achat - 1
+    print(f"Generated {n_achats} purchases to {output_path}")
+    return n_achats
+
+
+def count_purchases(
+    n_clients: int,
+    avg_purchase_per_clients: int,
+    seed: int = DEFAULT_SEED,
+    chunk_size: int = CHUNK_SIZE,
+    profile: str = "uniform"
+) -> int:
+    """Number of purchases the vectorized mode generates, without generating them."""
+    profile_params = get_profile(profile)
+    return sum(
+        int(draw_purchase_counts(chunk_index, size, avg_purchase_per_clients, seed, profile_params).sum())
+        for chunk_index, _, size in iter_chunks(n_clients, chunk_size)
+    )
+
+
+# ============== Sharded generation ==============
+
+def shard_file_name(entity: str, shard_index: int) -> str:
+    """Name of the output file of a shard, e.g. achats-00017.csv."""
+    return f"{entity}-{shard_index:05d}.csv"
+
+
+def plan_shards(
+    n_clients: int,
+    avg_purchase_per_clients: int,
+    n_shards: int,
+    seed: int,
+    chunk_size: int,
+    profile: str = "uniform"
+) -> list[dict]:
+    """
+    Split the client id space into contiguous shards of whole chunks.
+
+    Purchase counts are drawn from their own random stream, so the first
+    id_achat of every shard is known without generating any purchase row.
+
+    Returns:
+        One dictionary per shard with shard_index, chunks, first_id_achat
+        and the total n_clients.
+    """
+    profile_params = get_profile(profile)
+    chunks = list(iter_chunks(n_clients, chunk_size))
+    n_shards = max(1, min(n_shards, len(chunks)))
+
+    shards = []
+    id_achat = 1
+    for shard_index, shard_chunks in enumerate(np.array_split(np.arange(len(chunks)), n_shards)):
+        shard = {
+            "shard_index": shard_index,
+            "chunks": [chunks[i] for i in shard_chunks],
+            "first_id_achat": id_achat,
+            "n_clients": n_clients
+        }
+        for chunk_index, _, size in shard["chunks"]:
+            counts = draw_purchase_counts(chunk_index, size, avg_purchase_per_clients, seed, profile_params)
+            id_achat += int(counts.sum())
+        shards.append(shard)
+
+    return shards
+
+
+def generate_shard(
+    shard: dict,
+    avg_purchase_per_clients: int,
+    output_dir: str,
+    seed: int,
+    reference_date: date,
+    profile: str = "uniform",
+    defects: Optional[dict[str, dict[str, float]]] = None
+) -> tuple[int, int]:
+    """
+    Generate the clients and purchases files of one shard.
+
+    Chunks are seeded by their global chunk index, so a shard produces
+    exactly the rows the single-file vectorized mode produces for its ids.
+
+    Returns:
+        Tuple of (clients written, purchases written).
+    """
+    profile_params = get_profile(profile)
+    catalogue = build_catalogue(profile_params)
+    vocab = build_vocabularies(seed)
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    clients_path = output_dir / shard_file_name("clients", shard["shard_index"])
+    achats_path = output_dir / shard_file_name("achats", shard["shard_index"])
+
+    n_clients = 0
+    id_achat = shard["first_id_achat"]
+    with open(clients_path, 'w', newline='', encoding='utf-8') as clients_file, \
+            open(achats_path, 'w', newline='', encoding='utf-8') as achats_file:
+        for position, (chunk_index, start_id, size) in enumerate(shard["chunks"]):
+            clients = build_clients_chunk(
+                chunk_index, start_id, size, vocab, seed, reference_date, profile_params
+            )
+            write_entity_chunk(
+                clients, "clients", clients_file, position == 0, chunk_index, seed, defects, shard["n_clients"]
+            )
+            n_clients += size
+
+            counts = draw_purchase_counts(chunk_index, size, avg_purchase_per_clients, seed, profile_params)
+            achats = build_achats_chunk(
+                chunk_index, start_id, counts, id_achat, seed, reference_date, profile_params, catalogue
+            )
+            write_entity_chunk(
+                achats, "achats", achats_file, position == 0, chunk_index, seed, defects, shard["n_clients"]
+            )
+            id_achat += len(achats)
+
+    return n_clients, id_achat - shard["first_id_achat"]
+
+
+def generate_sharded(
+    n_clients: int,
+    avg_purchase_per_clients: int,
+    output_dir: str,
+    n_shards: int,
+    workers: Optional[int] = None,
+    seed: int = DEFAULT_SEED,
+    chunk_size: int = CHUNK_SIZE,
+    reference_date: Optional[date] = None,
+    profile: str = "uniform",
+    defects: Optional[dict[str, dict[str, float]]] = None
+) -> list[Path]:
+    """
+    Generate clients and purchases as per-shard files on a process pool.
+
+    Files are named clients-00000.csv, achats-00000.csv, ... Concatenating
+    the shards in order (see merge_shard_files) gives the same data as
+    generate_clients_vectorized/generate_achats_vectorized, whatever the
+    number of workers or shards.
+
+    Args:
+        n_clients: Number of clients to generate.
+        avg_purchase_per_clients: Average number of purchases per client.
+        output_dir: Directory where shard files are written.
+        n_shards: Number of shards (capped to the number of chunks).
+        workers: Size of the process pool (default: number of CPUs).
+        seed: Seed of the generation.
+        chunk_size: Number of clients generated per chunk.
+        reference_date: Date the generated dates are relative to (default: DEFAULT_REFERENCE_DATE).
+        profile: Name of the distribution profile (see PROFILES).
+        defects: Defect rates to inject (see build_defect_rates), None for clean data.
+
+    Returns:
+        List of the written file paths.
+    """
+    reference_date = reference_date or DEFAULT_REFERENCE_DATE
+    shards = plan_shards(n_clients, avg_purchase_per_clients, n_shards, seed, chunk_size, profile)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(
+                generate_shard, shard, avg_purchase_per_clients, str(output_dir), seed, reference_date,
+                profile, defects
+            )
+            for shard in shards
+        ]
+        totals = [future.result() for future in futures]
+
+    print(
+        f"Generated {sum(t[0] for t in totals)} clients and {sum(t[1] for t in totals)} purchases "
+        f"in {len(shards)} shards to {output_dir}"
+    )
+
+    output_dir = Path(output_dir)
+    return [
+        output_dir / shard_file_name(entity, shard["shard_index"])
+        for shard in shards
+        for entity in ("clients", "achats")
+    ]
+
+
+def merge_shard_files(output_dir: str, entity: str, output_path: str) -> None:
+    """Concatenate the shard files of an entity into a single CSV file."""
+    shard_paths = sorted(Path(output_dir).glob(f"{entity}-[0-9][0-9][0-9][0-9][0-9].csv"))
+
+    with open(output_path, 'wb') as output:
+        for position, shard_path in enumerate(shard_paths):
+            with open(shard_path, 'rb') as shard:
+                header = shard.readline()
+                if position == 0:
+                    output.write(header)
+                while block := shard.read(1 << 20):
+                    output.write(block)
+
+    print(f"Merged {len(shard_paths)} {entity} shards to {output_path}")
+
+
+# ============== Incremental deltas ==============
+
+def pick_existing_ids(
+    rng: np.random.Generator,
+    max_id: int,
+    n: int,
+    excluded: np.ndarray
+) -> np.ndarray:
+    """Pick up to n distinct ids in 1..max_id that are not in excluded."""
+    candidates = np.unique(rng.integers(1, max_id + 1, n * 2 + 16))
+    candidates = candidates[~np.isin(candidates, excluded)]
+    return rng.permutation(candidates)[:n]
+
+
+def generate_delta_timeline(
+    n_clients: int,
+    n_achats: int,
+    output_dir: str,
+    n_days: int,
+    change_rate: float = 0.001,
+    seed: int = DEFAULT_SEED,
+    reference_date: Optional[date] = None,
+    profile: str = "uniform"
+) -> list[Path]:
+    """
+    Generate daily delta files on top of a vectorized base snapshot.
+
+    Each day D (reference_date + 1 .. reference_date + n_days) writes
+    clients_delta_D.csv and achats_delta_D.csv with an extra "op" column
+    (I = insert, U = update, D = delete). A purchases delta touches about
+    change_rate * n_achats rows, split according to DELTA_MIX:
+    - new: purchases dated D, possibly by clients created that day
+    - late: backdated purchases arriving 3 to 60 days late
+    - corrected: new montant for an existing id_achat (other columns empty)
+    - deleted: existing id_achat to remove (other columns empty)
+
+    Args:
+        n_clients: Number of clients of the base snapshot.
+        n_achats: Number of purchases of the base snapshot.
+        output_dir: Directory where delta files are written.
+        n_days: Number of daily deltas.
+        change_rate: Share of the base purchases changed per day.
+        seed: Seed of the generation.
+        reference_date: Reference date of the base snapshot (default: DEFAULT_REFERENCE_DATE).
+        profile: Name of the distribution profile (see PROFILES).
+
+    Returns:
+        List of the written file paths.
+    """
+    reference_date = reference_date or DEFAULT_REFERENCE_DATE
+    profile_params = get_profile(profile)
+    products, product_weights = build_catalogue(profile_params)
+    vocab = build_vocabularies(seed)
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    next_id_client = n_clients + 1
+    next_id_achat = n_achats + 1
+    deleted = np.array([], dtype=np.int64)
+    paths = []
+
+    for day_index in range(n_days):
+        day = reference_date + timedelta(days=day_index + 1)
+        rng = chunk_rng(seed, STREAM_DELTA_ACHATS, day_index)
+
+        n_changes = max(1, round(n_achats * change_rate))
+        n_new = round(n_changes * DELTA_MIX["new"])
+        n_late = round(n_changes * DELTA_MIX["late"])
+        n_corrected = round(n_changes * DELTA_MIX["corrected"])
+        n_deleted = round(n_changes * DELTA_MIX["deleted"])
+
+        # New clients, change_rate of the base clients per day
+        n_new_clients = max(1, round(n_clients * change_rate))
+        clients = build_clients_chunk(
+            day_index, next_id_client, n_new_clients, vocab, seed, reference_date,
+            profile_params, stream=STREAM_DELTA_CLIENTS
+        )
+        clients["date_inscription"] = day.isoformat()
+        clients["op"] = OP_INSERT
+        next_id_client += n_new_clients
+
+        # Inserted purchases: new ones dated today, late ones backdated
+        n_inserted = n_new + n_late
+        offsets = np.concatenate([np.zeros(n_new, dtype=np.int64), rng.integers(3, 61, n_late)])
+        if product_weights is not None:
+            product_idx = rng.choice(len(products), n_inserted, p=product_weights)
+        else:
+            product_idx = rng.integers(0, len(products), n_inserted)
+        inserted = pd.DataFrame({
+            "id_achat": np.arange(next_id_achat, next_id_achat + n_inserted, dtype=np.int64),
+            "id_client": rng.integers(1, next_id_client, n_inserted),
+            "date_achat": days_before(day, offsets),
+            "montant": np.round(rng.uniform(10.0, 2000.0, n_inserted), 2),
+            "produit": products[product_idx],
+            "op": OP_INSERT
+        })
+        next_id_achat += n_inserted
+
+        # Corrections and deletions target existing, not yet deleted purchases
+        targets = pick_existing_ids(rng, next_id_achat - 1, n_corrected + n_deleted, deleted)
+        corrected_ids, deleted_ids = targets[:n_corrected], targets[n_corrected:]
+        corrected = pd.DataFrame({
+            "id_achat": corrected_ids,
+            "montant": np.round(rng.uniform(10.0, 2000.0, len(corrected_ids)), 2),
+            "op": OP_UPDATE
+        })
+        removed = pd.DataFrame({"id_achat": deleted_ids, "op": OP_DELETE})
+        deleted = np.concatenate([deleted, deleted_ids])
+
+        achats = pd.concat([inserted, corrected, removed], ignore_index=True)
+        achats["id_client"] = achats["id_client"].astype("Int64")
+        achats = achats[ACHAT_COLUMNS + ["op"]]
+
+        clients_path = output_dir / f"clients_delta_{day.isoformat()}.csv"
+        achats_path = output_dir / f"achats_delta_{day.isoformat()}.csv"
+        with open(clients_path, 'w', newline='', encoding='utf-8') as file:
+            write_chunk(clients, file, header=True)
+        with open(achats_path, 'w', newline='', encoding='utf-8') as file:
+            write_chunk(achats, file, header=True)
+        paths.extend([clients_path, achats_path])
+
+        print(
+            f"Delta {day.isoformat()}: {n_new_clients} new clients, {n_new} new, {n_late} late, "
+            f"{len(corrected_ids)} corrected, {len(deleted_ids)} deleted purchases"
+        )
+
+    return paths
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Generate fake clients and purchases CSV files.")
+    parser.add_argument("--mode", choices=["faker", "vectorized"], default="faker",
+                        help="faker: row by row (small datasets); vectorized: NumPy chunks (benchmarks)")
+    parser.add_argument("--clients", type=int, default=1500, help="Number of clients")
+    parser.add_argument("--avg-purchases", type=int, default=5, help="Average purchases per client")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="Random seed")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Clients per chunk (vectorized)")
+    parser.add_argument("--reference-date", type=date.fromisoformat, default=None,
+                        help="Date generated dates are relative to, YYYY-MM-DD "
+                             f"(vectorized, default: {DEFAULT_REFERENCE_DATE.isoformat()})")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="uniform",
+                        help="Distribution profile (vectorized)")
+    parser.add_argument("--dirty", choices=sorted(DIRTY_LEVELS), default="clean",
+                        help="Share of defective rows to inject (vectorized)")
+    parser.add_argument("--defect-rate", action="append", default=[], metavar="DEFECT=RATE",
+                        help="Override the rate of one defect, e.g. overflow_line=0.0001 (repeatable)")
+    parser.add_argument("--shards", type=int, default=0,
+                        help="Write per-shard files with this many shards (vectorized, 0 = single files)")
+    parser.add_argument("--workers", type=int, default=None, help="Process pool size for --shards (default: CPUs)")
+    parser.add_argument("--deltas", type=int, default=0,
+                        help="Also write this many daily delta files after the base snapshot (vectorized)")
+    parser.add_argument("--change-rate", type=float, default=0.001,
+                        help="Share of purchases changed per daily delta")
+    parser.add_argument("--output-dir", type=Path,
+                        default=Path(__file__).parent.parent / "data" / "sources",
+                        help="Output directory")
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
-    output_dir = Path(__file__).parent.parent / "data" / "sources"
-    
-    clients_ids = generate_clients(1500, output_dir / "clients.csv")
-    generate_achats(clients_ids, 5, output_dir / "achats.csv")
\ No newline at end of file
+    args = parse_args()
+    output_dir = args.output_dir
+    defects = build_defect_rates(
+        args.dirty,
+        {name: float(rate) for name, rate in (item.split("=", 1) for item in args.defect_rate)}
+    )
+
+    if args.mode == "vectorized" and args.shards > 0:
+        generate_sharded(
+            args.clients, args.avg_purchases, output_dir, args.shards, workers=args.workers,
+            seed=args.seed, chunk_size=args.chunk_size, reference_date=args.reference_date,
+            profile=args.profile, defects=defects
+        )
+    elif args.mode == "vectorized":
+        generate_clients_vectorized(
+            args.clients, output_dir / "clients.csv",
+            seed=args.seed, chunk_size=args.chunk_size, reference_date=args.reference_date,
+            profile=args.profile, defects=defects
+        )
+        generate_achats_vectorized(
+            args.clients, args.avg_purchases, output_dir / "achats.csv",
+            seed=args.seed, chunk_size=args.chunk_size, reference_date=args.reference_date,
+            profile=args.profile, defects=defects
+        )
+    else:
+        Faker.seed(args.seed)
+        random.seed(args.seed)
+        clients_ids = generate_clients(args.clients, output_dir / "clients.csv")
+        generate_achats(clients_ids, args.avg_purchases, output_dir / "achats.csv")
+
+    if args.mode == "vectorized" and args.deltas > 0:
+        n_achats = count_purchases(
+            args.clients, args.avg_purchases,
+            seed=args.seed, chunk_size=args.chunk_size, profile=args.profile
+        )
+        generate_delta_timeline(
+            args.clients, n_achats, output_dir / "deltas", args.deltas,
+            change_rate=args.change_rate, seed=args.seed, reference_date=args.reference_date,
+            profile=args.profile
+        )